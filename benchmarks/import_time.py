@@ -0,0 +1,102 @@
+"""
+Measure the import cost of the Streamlit entry points with 'python -X importtime' and check it
+against the budgets in benchmarks/import_budgets.json: a total import time and the heavy
+modules that must not be imported before they are needed.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --entry app.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUDGETS_FILE = os.path.join(os.path.dirname(__file__), "import_budgets.json")
+
+# Runs an entry point the way 'streamlit run' would execute it, in bare mode
+RUNNER = "import runpy, sys; sys.path.insert(0, {root!r}); runpy.run_path({entry!r}, run_name='__main__')"
+
+
+def parse_importtime(stderr):
+    """
+    Parse the '-X importtime' report.
+
+    Returns:
+        tuple[float, dict]: Total import time in ms and the cumulative ms of every imported module.
+    """
+    total_us = 0
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented below the module that triggered them
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+        modules[name.strip()] = int(cumulative) / 1000
+    return total_us / 1000, modules
+
+
+def measure(entry):
+    """Import an entry point in a fresh interpreter and return (import ms, modules, wall ms)."""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUNNER.format(root=ROOT, entry=entry)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"{entry} failed to run:\n{completed.stderr[-2000:]}")
+    import_ms, modules = parse_importtime(completed.stderr)
+    return import_ms, modules, wall_ms
+
+
+def check(entry, budget, repeat):
+    """Measure an entry point repeat times and compare the median with its budget."""
+    runs = [measure(entry) for _ in range(repeat)]
+    import_ms = statistics.median(run[0] for run in runs)
+    wall_ms = statistics.median(run[2] for run in runs)
+    modules = runs[-1][1]
+
+    forbidden = [name for name in budget.get("forbidden_modules", [])
+                 if any(module == name or module.startswith(name + ".") for module in modules)]
+    heaviest = sorted(((ms, name) for name, ms in modules.items() if "." not in name), reverse=True)[:10]
+    return {
+        "entry": entry,
+        "import_ms": round(import_ms, 1),
+        "wall_ms": round(wall_ms, 1),
+        "max_import_ms": budget.get("max_import_ms"),
+        "forbidden_imported": forbidden,
+        "heaviest_top_level": {name: round(ms, 1) for ms, name in heaviest},
+        "ok": not forbidden and import_ms <= budget.get("max_import_ms", float("inf")),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time budgets of the Streamlit entry points.")
+    parser.add_argument("--entry", action="append", help="Entry point to check. Defaults to all budgeted ones.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per entry point, the median is reported.")
+    parser.add_argument("--budgets", default=BUDGETS_FILE)
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    with open(args.budgets, encoding="utf-8") as f:
+        budgets = json.load(f)
+    entries = args.entry or list(budgets)
+    results = [check(entry, budgets.get(entry, {}), args.repeat) for entry in entries]
+
+    report = {"python": sys.version.split()[0], "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
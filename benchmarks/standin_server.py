@@ -0,0 +1,163 @@
+"""
+Local stand-in for Trendyol's listing pages, used to exercise the scraper offline.
+
+The server renders synthetic listing pages and can inject latency, random 429/503 responses,
+pages that always answer 404 or 503, and a concurrency limit above which it answers 429 with
+a Retry-After header, the way a rate limiter in front of the real site would.
+
+    python -m benchmarks.standin_server --port 8000 --latency 0.05 --max-inflight 8
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.synthetic import render_listing
+
+
+class StandinServer:
+    def __init__(self, total_products=24 * 50, cards_per_page=24, latency=0.0, latency_jitter=0.0,
+                 throttle_rate=0.0, error_rate=0.0, max_inflight=None, retry_after=1, port=0,
+                 missing_pages=(), failing_pages=()):
+        """
+        Initialize the StandinServer
+
+        Args:
+            total_products (int): Products in the category; pages past them are empty.
+            cards_per_page (int): Product cards on each listing page.
+            latency (float): Seconds every response is delayed.
+            latency_jitter (float): Extra random delay of up to this many seconds.
+            throttle_rate (float): Share of requests answered with 429.
+            error_rate (float): Share of requests answered with 503.
+            max_inflight (int | None): Concurrent requests above which the server answers 429.
+            retry_after (int): Retry-After value sent with every 429.
+            port (int): Port to listen on, 0 picks a free one.
+            missing_pages (Iterable[int]): Pages always answered with 404.
+            failing_pages (Iterable[int]): Pages always answered with 503.
+        """
+        self.total_products = total_products
+        self.cards_per_page = cards_per_page
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.max_inflight = max_inflight
+        self.retry_after = retry_after
+        self.missing_pages = set(missing_pages)
+        self.failing_pages = set(failing_pages)
+
+        self.requests = 0
+        self.page_requests = {}
+        self.throttled = 0
+        self.errors = 0
+        self.inflight = 0
+        self.peak_inflight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL of the stand-in category listing."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/telefon-x-c1"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, body, headers = server.respond(self.path)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def respond(self, path):
+        """Return (status, body, headers) for a request path."""
+        with self._lock:
+            self.requests += 1
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+            overloaded = self.max_inflight is not None and self.inflight > self.max_inflight
+        try:
+            time.sleep(self.latency + random.uniform(0, self.latency_jitter))
+            if overloaded or random.random() < self.throttle_rate:
+                with self._lock:
+                    self.throttled += 1
+                return 429, b"Too Many Requests", {"Retry-After": str(self.retry_after)}
+            if random.random() < self.error_rate:
+                with self._lock:
+                    self.errors += 1
+                return 503, b"Service Unavailable", {}
+
+            page = int(parse_qs(urlparse(path).query).get("pi", ["1"])[0])
+            with self._lock:
+                self.page_requests[page] = self.page_requests.get(page, 0) + 1
+            if page in self.missing_pages:
+                return 404, b"Not Found", {}
+            if page in self.failing_pages:
+                return 503, b"Service Unavailable", {}
+            body = render_listing(page, self.total_products, self.cards_per_page)
+            return 200, body, {"Content-Type": "text/html; charset=utf-8"}
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+    def start(self):
+        """Serve requests from a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic Trendyol listing pages.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--products", type=int, default=24 * 50)
+    parser.add_argument("--cards-per-page", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-inflight", type=int, default=None)
+    args = parser.parse_args()
+
+    server = StandinServer(args.products, args.cards_per_page, args.latency, args.latency_jitter,
+                           args.throttle_rate, args.error_rate, args.max_inflight, port=args.port)
+    print(f"Serving {server.url}")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
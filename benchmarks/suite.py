@@ -0,0 +1,238 @@
+"""
+Offline benchmark suite for the parser, the scraper and the cleaner.
+
+Every case runs in a fresh process so its peak RSS is its own. Results are printed and can be
+written as JSON and compared with an earlier run to spot regressions.
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --only parser,cleaner --cleaner-rows 10000,100000 --compare bench.json
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SECTIONS = ("parser", "scrape", "cleaner")
+
+# Field identifying a case of every section and the throughput that should not go down between versions
+THROUGHPUT_METRICS = {
+    "parser": ("backend", "pages_per_sec"),
+    "scrape": ("max_workers", "pages_per_sec"),
+    "cleaner": ("rows", "rows_per_sec"),
+}
+
+
+def _peak_rss_mb():
+    """Return the peak resident set size of the current process in MB, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / 1024 ** (2 if sys.platform == "darwin" else 1), 1)
+
+
+def _isolated_case(func, args):
+    """Run a benchmark case in the current (child) process and add its peak RSS to the result."""
+    logging.getLogger().setLevel(logging.WARNING)
+    result = func(*args)
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def run_isolated(func, *args):
+    """Run a benchmark case in a fresh process and return its result."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_isolated_case, func, args).result()
+
+
+def parser_case(backend, pages, cards_per_page):
+    """Parse synthetic listing pages with one backend and return pages and products per second."""
+    from benchmarks.synthetic import render_listing
+    from src.trendyol_scraper import TrendyolScraper
+
+    html = [render_listing(page, pages * cards_per_page, cards_per_page) for page in range(1, pages + 1)]
+    scraper = TrendyolScraper(parser_backend=backend)
+    started = time.perf_counter()
+    products = sum(len(scraper.parse_product_page(page)) for page in html)
+    elapsed = time.perf_counter() - started
+    return {
+        "backend": backend,
+        "pages": pages,
+        "cards_per_page": cards_per_page,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 1),
+        "products_per_sec": round(products / elapsed, 1),
+    }
+
+
+def parser_equivalence(pages, cards_per_page):
+    """Check that every parser backend returns exactly what the bs4 reference does."""
+    from benchmarks.synthetic import render_listing
+    from src.parsers import PARSER_BACKENDS, parse_products
+
+    mismatches = []
+    for page in range(1, pages + 1):
+        html = render_listing(page, pages * cards_per_page, cards_per_page)
+        expected = parse_products(html, "bs4")
+        mismatches.extend(
+            {"backend": backend, "page": page}
+            for backend in sorted(set(PARSER_BACKENDS) - {"bs4"}) if parse_products(html, backend) != expected
+        )
+    return {"pages": pages, "equivalent": not mismatches, "mismatches": mismatches}
+
+
+def scrape_case(max_workers, pages, cards_per_page, latency, parser_backend):
+    """Scrape the stand-in server end to end and return pages and products per second."""
+    from benchmarks.standin_server import StandinServer
+    from src.trendyol_scraper import TrendyolScraper
+
+    with StandinServer(total_products=pages * cards_per_page, cards_per_page=cards_per_page,
+                       latency=latency, latency_jitter=latency / 2) as server:
+        scraper = TrendyolScraper(base_url=server.url, max_pages=pages, max_workers=max_workers,
+                                  parser_backend=parser_backend)
+        started = time.perf_counter()
+        data = scraper.scrape_trendyol()
+        elapsed = time.perf_counter() - started
+    return {
+        "max_workers": max_workers,
+        "pages": pages,
+        "latency": latency,
+        "parser_backend": parser_backend,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 1),
+        "products_per_sec": round(len(data) / elapsed, 1),
+        "products": len(data),
+    }
+
+
+def write_raw_csv(rows, path):
+    """Write synthetic raw rows to a CSV file the cleaner reads."""
+    from benchmarks.synthetic import raw_products
+
+    raw_products(rows).to_csv(path, index=False, encoding="utf-8")
+    return {"rows": rows, "bytes": os.path.getsize(path)}
+
+
+def cleaner_case(rows, path):
+    """Clean a raw CSV file and return rows per second and the cleaner's step timings."""
+    from src.cleaner import DataCleaner
+
+    cleaner = DataCleaner(file_path=path)
+    started = time.perf_counter()
+    cleaned = cleaner.clean()
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "cleaned_rows": 0 if cleaned is None else len(cleaned),
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1),
+        "step_seconds": {step: round(seconds, 3) for step, seconds in cleaner.timings.items()},
+    }
+
+
+def git_commit():
+    """Return the short commit hash of the benchmarked tree, or None outside of git."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Return the cases whose throughput dropped by more than tolerance against the baseline."""
+    regressions = []
+    for section, (key, metric) in THROUGHPUT_METRICS.items():
+        previous = {case[key]: case for case in baseline.get(section, [])}
+        for case in results.get(section, []):
+            before = previous.get(case[key])
+            if before is not None and case[metric] < before[metric] * (1 - tolerance):
+                regressions.append({
+                    "section": section, key: case[key], "metric": metric,
+                    "baseline": before[metric], "current": case[metric],
+                })
+    return regressions
+
+
+def int_list(value):
+    """Parse a comma separated list of integers."""
+    return [int(item) for item in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline parser, scraper and cleaner benchmarks.")
+    parser.add_argument("--only", default=",".join(SECTIONS), help="Comma separated sections to run.")
+    parser.add_argument("--parser-pages", type=int, default=200)
+    parser.add_argument("--cards-per-page", type=int, default=24)
+    parser.add_argument("--scrape-pages", type=int, default=40)
+    parser.add_argument("--workers", type=int_list, default=[1, 2, 5, 10, 20])
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the stand-in server delays a page.")
+    parser.add_argument("--scrape-parser", default="bs4", help="Parser backend of the scrape benchmark.")
+    parser.add_argument("--cleaner-rows", type=int_list, default=[10_000, 100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Earlier results JSON to check for throughput regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Throughput drop reported as a regression.")
+    args = parser.parse_args()
+    sections = [section.strip() for section in args.only.split(",")]
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        }
+    }
+
+    if "parser" in sections:
+        results["parser_equivalence"] = run_isolated(parser_equivalence, args.parser_pages, args.cards_per_page)
+        results["parser"] = [run_isolated(parser_case, backend, args.parser_pages, args.cards_per_page)
+                             for backend in ("bs4", "lxml")]
+
+    if "scrape" in sections:
+        results["scrape"] = [
+            run_isolated(scrape_case, workers, args.scrape_pages, args.cards_per_page, args.latency,
+                         args.scrape_parser)
+            for workers in args.workers
+        ]
+
+    if "cleaner" in sections:
+        results["cleaner"] = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for rows in args.cleaner_rows:
+                path = os.path.join(temp_dir, f"raw_{rows}.csv")
+                run_isolated(write_raw_csv, rows, path)
+                results["cleaner"].append(run_isolated(cleaner_case, rows, path))
+                os.remove(path)
+
+    failed = False
+    if "parser_equivalence" in results and not results["parser_equivalence"]["equivalent"]:
+        failed = True
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            results["regressions"] = compare(results, json.load(f), args.tolerance)
+        failed = failed or bool(results["regressions"])
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Synthetic Trendyol-style data for the offline benchmarks: listing page HTML for the parser and
+the stand-in server, and raw scraped rows for the cleaner.
+
+Cards vary deterministically with their index the way real listings do: some products have no
+ratings yet, some have no description, some are not discounted and names contain Turkish
+characters and HTML entities.
+"""
+import numpy as np
+import pandas as pd
+
+BRANDS = ["Apple", "Samsung", "Xiaomi", "Oppo", "Realme", "Huawei", "Honor", "Tecno", "Infinix",
+          "Nokia", "Reeder", "General Mobile", "Poco", "Vivo", "TCL", "Omix", "Çağ & Şık"]
+
+
+def render_card(index):
+    """Render one product card the way Trendyol's listing does."""
+    brand = BRANDS[index % len(BRANDS)].replace("&", "&amp;")
+    has_ratings = index % 11 != 0
+    name_classes = "prdct-desc-cntnr-name hasRatings" if has_ratings else "prdct-desc-cntnr-name"
+    price_classes = "price-item discounted" if index % 7 != 0 else "price-item"
+    parts = [
+        '<div class="p-card-wrppr with-campaign-view">',
+        f'<span class="prdct-desc-cntnr-ttl"> {brand} </span>',
+        f'<span class="{name_classes}">Akıllı Telefon {index}</span>',
+    ]
+    if index % 13 != 0:
+        parts.append(f'<div class="product-desc-sub-text">{64 + index % 4 * 64} GB</div>')
+    if has_ratings:
+        parts.append(f'<span class="rating-score">{3 + index % 20 / 10:.1f}</span>')
+        parts.append(f'<div class="ratings">({index % 500})</div>')
+    parts.append(f'<div class="{price_classes}">{10 + index % 90}.{index % 1000:03d},99 TL</div>')
+    parts.append('</div>')
+    return "".join(parts)
+
+
+def render_listing(page, total_products, cards_per_page):
+    """Render a listing page holding the products of the given page number."""
+    first = (page - 1) * cards_per_page
+    cards = "".join(render_card(index) for index in range(first, min(first + cards_per_page, total_products)))
+    return (
+        '<html><head><meta charset="utf-8"></head><body>'
+        f'<div class="dscrptn"><h2>"telefon" araması için {total_products} sonuç listeleniyor</h2></div>'
+        f'<div class="prdct-cntnr-wrppr">{cards}</div></body></html>'
+    ).encode("utf-8")
+
+
+def raw_products(rows, duplicate_rate=0.05, missing_rate=0.02, seed=0):
+    """
+    Generate rows as the scraper stores them, with string ratings and Turkish price notation.
+
+    Args:
+        rows (int): Number of rows.
+        duplicate_rate (float): Share of rows repeating an earlier product.
+        missing_rate (float): Share of rows missing a price, which the cleaner drops.
+        seed (int): Seed of the generator.
+
+    Returns:
+        pd.DataFrame: Rows with the scraper's columns.
+    """
+    rng = np.random.default_rng(seed)
+    product = np.arange(rows)
+    duplicates = rng.random(rows) < duplicate_rate
+    product[duplicates] = rng.integers(0, rows, duplicates.sum())
+
+    brands = np.array(BRANDS, dtype=object)[product % len(BRANDS)]
+    rated = product % 11 != 0
+    rating_score = np.where(rated, (3 + product % 20 / 10).round(1).astype(str), None)
+    rating_count = np.where(rated, (product % 500).astype(str), None)
+    prices = (10 + product % 90).astype(str).astype(object) + "." + \
+        np.char.zfill((product % 1000).astype(str), 3).astype(object) + ",99 TL"
+    prices[rng.random(rows) < missing_rate] = None
+
+    return pd.DataFrame({
+        "Product Brand": brands,
+        "Product Name": "Akıllı Telefon " + pd.Series(product).astype(str),
+        "Product Description": np.where(product % 13 != 0, (64 + product % 4 * 64).astype(str) + " GB", None),
+        "Rating Score": rating_score,
+        "Rating Count": rating_count,
+        "Price (TL)": prices,
+    })
@@ -0,0 +1,54 @@
+"""
+Crawl the local stand-in server while it throttles and delays requests, and check that the
+adaptive concurrency controller and the retries still deliver every page.
+
+    python -m benchmarks.throttle_check --throttle-rate 0.1 --max-inflight 6 --latency 0.05
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.standin_server import StandinServer
+from src.trendyol_scraper import TrendyolScraper
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a throttling stand-in server and report lost pages.")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--throttle-rate", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--max-inflight", type=int, default=6)
+    parser.add_argument("--async-mode", action="store_true")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with StandinServer(total_products=24 * args.pages, latency=args.latency, throttle_rate=args.throttle_rate,
+                       error_rate=args.error_rate, max_inflight=args.max_inflight, retry_after=0) as server:
+        scraper = TrendyolScraper(base_url=server.url, max_pages=args.pages, async_mode=args.async_mode,
+                                  adaptive_concurrency=True, max_concurrency=32, max_retries=8)
+        started = time.perf_counter()
+        data = scraper.scrape_trendyol()
+        elapsed = time.perf_counter() - started
+
+    result = {
+        "seconds": round(elapsed, 3),
+        "products": len(data),
+        "expected_products": 24 * args.pages,
+        "server_requests": server.requests,
+        "server_throttled": server.throttled,
+        "server_errors": server.errors,
+        "server_peak_inflight": server.peak_inflight,
+        "report": scraper.report.to_dict(),
+    }
+    print(json.dumps(result, indent=2))
+    if scraper.report.failed_pages or len(data) != 24 * args.pages:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
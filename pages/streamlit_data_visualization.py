@@ -1,16 +1,244 @@
 import streamlit as st
-import plotly.express as px
+import io
 import sys
 import os
 import tempfile
-import seaborn as sns
-import matplotlib.pyplot as plt
 import streamlit.components.v1 as components
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from src.trendyol_scraper import TrendyolScraper
-from src.cleaner import DataCleaner
+from src.dataset_registry import DatasetRegistry
+from src.jobs import DONE, FAILED, JobManager
 
+# Plotly, pandas, matplotlib/seaborn and the scraper are imported where they are first needed,
+# so opening the page without data does not pay for them. benchmarks/import_time.py keeps
+# an eye on it.
+
+
+# Aggregations and figures are cached across reruns and sessions, keyed on the dataset
+# version and the filters. The frame itself (leading underscore) is not hashed.
+@st.cache_resource(show_spinner=False, max_entries=16)
+def brand_figures(_summary, version, filters):
+    """Build the brand charts and the top rated products table from the precomputed brand summary."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    brand_summary = _summary.rename(columns={'Average Rating': 'Rating Score', 'Average Price (TL)': 'Price (TL)'})
+
+    # Bar Chart: Average Rating by Brand
+    avg_rating = brand_summary.sort_values(by=['Rating Score', 'Product Brand'], ascending=[False, True])
+    fig1 = px.bar(
+        avg_rating, x='Product Brand', y='Rating Score', 
+        title='Average Rating by Product Brand', 
+        labels={'Product Brand': 'Brand', 'Rating Score': 'Average Rating'},
+        color='Product Brand', color_discrete_sequence=px.colors.qualitative.Set1
+    )
+    fig1.update_layout(title_x=0.5, template='plotly_dark', xaxis_tickangle=-45, plot_bgcolor='#194d61')
+
+    # Bar Chart: Average Price by Brand
+    avg_price = brand_summary.sort_values(by=['Price (TL)', 'Product Brand'], ascending=[False, True])
+    fig2 = px.bar(
+        avg_price, x='Product Brand', y='Price (TL)', 
+        title='Average Price by Product Brand', 
+        labels={'Product Brand': 'Brand', 'Price (TL)': 'Average Price (TL)'},
+        color='Product Brand', color_discrete_sequence=px.colors.qualitative.Set2
+    )
+    fig2.update_layout(title_x=0.5, template='plotly_dark', xaxis_tickangle=-45, plot_bgcolor='#194d61')
+
+    # Bar Chart: Product Count by Brand
+    product_count = brand_summary.sort_values(by='Product Count', ascending=False)
+    fig3 = px.bar(
+        product_count, x='Product Brand', y='Product Count', 
+        title='Product Count by Brand', 
+        labels={'Product Brand': 'Brand', 'Product Count': 'Number of Products'},
+        color='Product Brand', color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig3.update_layout(title_x=0.5, template='plotly_dark', xaxis_tickangle=-45, plot_bgcolor='#194d61')
+
+    # Pie Chart: Product Share by Brand
+    product_share = brand_summary.sort_values(by='Product Brand', ascending=True)
+    fig5 = px.pie(
+        product_share, names='Product Brand', values='Product Count', 
+        title='Product Share by Brand', 
+        color='Product Brand', color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    fig5.update_layout(title_x=0.5, template='plotly_dark')
+
+    # Box Plot: Price Distribution by Brand, drawn from the precomputed quartiles
+    fig6 = go.Figure()
+    colors = px.colors.qualitative.Set3
+    for i, row in enumerate(brand_summary.to_dict('records')):
+        fig6.add_trace(go.Box(
+            name=row['Product Brand'], x=[row['Product Brand']],
+            q1=[row['Price Q1']], median=[row['Price Median']], q3=[row['Price Q3']],
+            lowerfence=[row['Price Lower Fence']], upperfence=[row['Price Upper Fence']],
+            marker_color=colors[i % len(colors)]
+        ))
+    fig6.update_layout(
+        title='Price Distribution by Brand', xaxis_title='Brand', yaxis_title='Price (TL)',
+        template='plotly_dark', xaxis_tickangle=-45, plot_bgcolor='#194d61'
+    )
+
+    # Table of top-rated products by brand
+    top_rated_products = brand_summary[['Product Brand', 'Top Product Name', 'Top Product Rating', 'Top Product Price (TL)']]
+    top_rated_products.columns = ['Product Brand', 'Product Name', 'Rating Score', 'Price (TL)']
+
+    return fig1, fig2, fig3, fig5, fig6, top_rated_products.reset_index(drop=True)
+
+
+# Above this many points the scatter plot is drawn with WebGL instead of SVG
+WEBGL_MIN_POINTS = 1000
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def scatter_figure(_engine, version, filters):
+    """Build the price vs rating scatter plot, the one chart that needs product rows."""
+    import plotly.express as px
+    from src import analytics
+
+    filtered_data = _engine.rows(filters, ['Product Brand', 'Price (TL)', 'Rating Score'])
+    # Large datasets are thinned out keeping the density of the point cloud
+    plotted_data = analytics.density_sample(filtered_data, 'Price (TL)', 'Rating Score')
+
+    # Scatter Plot: Price vs Rating
+    title = 'Price vs Rating'
+    if len(plotted_data) < len(filtered_data):
+        title += f' ({len(plotted_data):,} of {len(filtered_data):,} products)'
+    fig4 = px.scatter(
+        plotted_data, x='Price (TL)', y='Rating Score', 
+        color='Product Brand', size_max=10, 
+        title=title, 
+        labels={'Price (TL)': 'Price (TL)', 'Rating Score': 'Rating'},
+        render_mode='webgl' if len(plotted_data) > WEBGL_MIN_POINTS else 'svg'
+    )
+    fig4.update_layout(template='plotly_dark', plot_bgcolor='#194d61')
+    return fig4
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def chart_payloads(_charts, version, filters):
+    """Return the size in KB of the JSON each Plotly figure is sent to the browser as."""
+    import pandas as pd
+
+    return pd.Series({name: round(len(fig.to_json()) / 1024, 1) for name, fig in _charts.items()}, name='KB')
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def correlation_heatmap_png(_engine, version, filters):
+    """Render the correlation heatmap once and return it as PNG bytes."""
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    # A standalone Figure keeps matplotlib's global pyplot state out of the script threads
+    fig7 = Figure(figsize=(8, 6))
+    ax7 = fig7.subplots()
+    correlation = _engine.correlation(filters)
+    sns.heatmap(correlation, annot=True, cmap='coolwarm', ax=ax7, vmin=-1, vmax=1)
+    ax7.set_title("Correlation Heatmap", fontsize=16)
+    ax7.set_facecolor('#194d61')
+    buffer = io.BytesIO()
+    fig7.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+
+# The query engine and the table index are kept by the registry next to their dataset, so they
+# count towards its memory budget and are dropped together with it
+def query_engine(dataset_key):
+    """Return the query engine that applies the dashboard filters to a dataset and the stored runs of its category."""
+    def build(result):
+        import pandas as pd
+        from src.query_engine import make_query_engine
+
+        path = result['summary_path']
+        summary = pd.read_parquet(path) if os.path.exists(path) else None
+        return make_query_engine(result['cleaned_data'], summary, store_dir=result['store_dir'],
+                                 category=result['category'], runs=(result['run_id'],))
+
+    return dataset_registry().derived(dataset_key, 'query_engine', build)
+
+
+def table_view(dataset_key):
+    """Return the server-side index the cleaned data table of a dataset is browsed through."""
+    def build(result):
+        from src.table_view import TableView
+
+        return TableView(result['cleaned_data'])
+
+    return dataset_registry().derived(dataset_key, 'table_view', build)
+
+
+@st.cache_resource(show_spinner=False)
+def dataset_registry():
+    """Return the process-wide registry of collected datasets, shared by all sessions."""
+    # Jobs reuse pages cached by earlier runs and stop at the category's last page when it has
+    # fewer pages than requested
+    page_cache_dir = os.path.join(tempfile.gettempdir(), "trendyol_page_cache")
+    jobs = JobManager(data_dir="data", cache_dir=page_cache_dir, adaptive_pagination=True, parser_backend="lxml")
+    return DatasetRegistry(jobs, ttl=600, max_bytes=1024 * 1024 * 1024)
+
+
+@st.fragment(run_every=1)
+def scrape_job_status():
+    """Poll the dataset the session asked for, show its progress and switch to it once it is ready."""
+    if 'scrape_job_message' in st.session_state:
+        kind, message = st.session_state.scrape_job_message
+        getattr(st, kind)(message)
+
+    if 'requested_dataset' not in st.session_state:
+        return
+    key = st.session_state.requested_dataset
+    job = dataset_registry().job(key)
+    state = job.snapshot() if job is not None else None
+
+    if state is None or state['status'] == DONE:
+        # Point the session at the shared dataset and redraw the whole page with it
+        result = dataset_registry().get(key)
+        if result is None:
+            st.session_state.scrape_job_message = ('error', "The collected data is no longer available.")
+        else:
+            st.session_state.dataset_key = key
+            st.session_state.scrape_job_message = (
+                'success', f"Data collected and cleaned: {len(result['cleaned_data'])} products."
+            )
+        del st.session_state.requested_dataset
+        st.rerun()
+    elif state['status'] == FAILED:
+        st.session_state.scrape_job_message = ('error', f"Data collection failed: {state['error']}")
+        del st.session_state.requested_dataset
+        st.rerun()
+    else:
+        st.progress(
+            job.progress(),
+            text=f"{state['status'].capitalize()}: {state['pages_done']}/{state['total_pages']} pages, "
+                 f"{state['products']} products, {state['errors']} errors"
+        )
+
+
+def crawl_diagnostics(metrics):
+    """Show the per-page timings of the crawl that collected the session's data in the sidebar."""
+    import json
+    from src.crawl_metrics import PHASE_NAMES, prometheus_text
+
+    with st.sidebar.expander("Crawl diagnostics"):
+        st.caption(
+            f"{metrics['pages']} pages ({metrics['cache_hits']} from cache, {metrics['failed_pages']} failed), "
+            f"{metrics['products']} products, {metrics['bytes'] / 1024 / 1024:.1f} MB in {metrics['duration_s']:.1f}s "
+            f"({metrics['pages_per_sec'] or 0:.1f} pages/s)"
+        )
+        st.dataframe([
+            {"Phase": PHASE_NAMES[field], **{name.upper(): None if value is None else round(value, 1)
+                                             for name, value in stats.items() if name not in ("count", "sum")}}
+            for field, stats in metrics['latency_ms'].items() if stats['count']
+        ], hide_index=True, use_container_width=True)
+        if metrics['errors']:
+            st.dataframe([{"Error": kind, "Requests": count} for kind, count in metrics['errors'].items()],
+                         hide_index=True, use_container_width=True)
+        if metrics['slowest_pages']:
+            st.caption("Slowest pages (ms)")
+            st.dataframe([{"URL": page['url'], "Total": round(page['total_ms'], 1)}
+                          for page in metrics['slowest_pages']], hide_index=True, use_container_width=True)
+        st.download_button("Metrics JSON", json.dumps(metrics, indent=2), "crawl_metrics.json",
+                           mime="application/json")
+        st.download_button("Prometheus", prometheus_text(metrics), "crawl_metrics.prom", mime="text/plain")
 
 
 # Configure the Streamlit page
@@ -62,31 +290,32 @@ button_style = """
 
 st.markdown(button_style, unsafe_allow_html=True)
 
-# Add a scraping button to the sidebar
+# Add a scraping button to the sidebar. The crawl runs as a background job, so the page
+# stays responsive and the job survives reruns of this session. Sessions asking for the
+# same category and page count share one crawl and one copy of the cleaned data
 if st.sidebar.button("Collect Data", type="tertiary"):
-    st.sidebar.info("Starting the scraping process...")
-
-    # Create a temporary directory for raw data storage
-    temp_dir = tempfile.mkdtemp()
-    output_file = os.path.join(temp_dir, "raw_data.csv")
-
-    # Initialize and run the Trendyol scraper
-    scraper = TrendyolScraper(base_url=base_url, max_pages=int(max_pages), output_file=output_file)
-    scraper.run()
-
-    # If scraping is successful, move to data cleaning
-    if os.path.exists(output_file):
-        st.sidebar.success("Scraping completed.")
-        st.sidebar.info("Cleaning data...")    
-        # Initialize the data cleaner and clean the scraped data
-        cleaner = DataCleaner(output_file)
-        cleaned_data = cleaner.clean()
-
-        if cleaned_data is not None:
-            st.sidebar.success("Data cleaning completed successfully.")
-            
-            # Save cleaned data to the session state
-            st.session_state.cleaned_data = cleaned_data
+    st.session_state.requested_dataset = dataset_registry().request(base_url, int(max_pages))
+    st.session_state.pop('scrape_job_message', None)
+
+# The session only keeps the key of its dataset, the data itself lives in the registry
+if 'dataset_key' in st.session_state:
+    dataset = dataset_registry().get(st.session_state.dataset_key)
+    if dataset is None:
+        # Evicted to stay within the memory budget
+        del st.session_state.dataset_key
+        for name in ('cleaned_data', 'cleaned_data_version', 'crawl_metrics'):
+            st.session_state.pop(name, None)
+        st.sidebar.warning("The collected data was dropped to free memory. Please collect it again.")
+    else:
+        st.session_state.cleaned_data = dataset['cleaned_data']
+        st.session_state.cleaned_data_version = dataset['version']
+        st.session_state.crawl_metrics = dataset.get('metrics')
+
+with st.sidebar:
+    scrape_job_status()
+
+if st.session_state.get('crawl_metrics'):
+    crawl_diagnostics(st.session_state.crawl_metrics)
 
 go_to_home_button = st.button("Go to home", key="custom_btn", type="tertiary")
 
@@ -118,103 +347,114 @@ if go_to_home_button:
 # Display content based on the selected page
 if page == "Data Visualization":
     if 'cleaned_data' in st.session_state:
-        # Filter data: Only include rows with a Rating Count of 75 or higher
-        filtered_data = st.session_state.cleaned_data[st.session_state.cleaned_data['Rating Count'] >= 75]
+        from src import analytics
+
+        cleaned_data = st.session_state.cleaned_data
+        if 'cleaned_data_version' not in st.session_state:
+            st.session_state.cleaned_data_version = analytics.dataset_version(cleaned_data)
+        version = st.session_state.cleaned_data_version
+
+        # Filters and aggregations run in the query engine, DuckDB when it is installed
+        engine = query_engine(st.session_state.dataset_key)
+        if engine is None:
+            # Evicted since the top of the script, which tells the user on the rerun
+            st.rerun()
+
+        # Sidebar filters, by default only products with a Rating Count of 75 or higher
+        st.sidebar.header("Filters")
+        min_rating_count = st.sidebar.select_slider(
+            "Minimum Rating Count:", options=analytics.RATING_COUNT_THRESHOLDS, value=analytics.MIN_RATING_COUNT
+        )
+        # Earlier runs of the category stay in the store and can be analysed instead of the collected one
+        runs = []
+        if len(engine.runs()) > 1:
+            runs = st.sidebar.multiselect("Scrape Runs:", engine.runs(), placeholder="Collected run")
+        runs = tuple(sorted(runs)) or None
+        lowest_price, highest_price = engine.price_bounds(runs)
+        price_range = st.sidebar.slider(
+            "Price Range (TL):", min_value=lowest_price, max_value=max(highest_price, lowest_price + 1),
+            value=(lowest_price, max(highest_price, lowest_price + 1))
+        )
+        brands = st.sidebar.multiselect("Brands:", engine.brands(runs), placeholder="All brands")
+        filters = analytics.Filters(
+            min_rating_count=min_rating_count,
+            price_range=None if price_range[0] <= lowest_price and price_range[1] >= highest_price else price_range,
+            brands=tuple(sorted(brands)) or None,
+            runs=runs,
+        )
+
+        # Brand charts come from the brand summary precomputed by the cleaner when only the rating
+        # count threshold is set, and from a filtered aggregation query otherwise
+        brand_summary = engine.brand_summary(filters)
+        if brand_summary.empty:
+            st.info("No products match the filters.")
+            st.stop()
+        fig1, fig2, fig3, fig5, fig6, top_rated_products = brand_figures(brand_summary, version, filters)
 
         # Column 1: Brand-focused visualizations
         with col1:
             st.subheader("Brand Analysis")
-
-            # Bar Chart: Average Rating by Brand
-            avg_rating = filtered_data.groupby('Product Brand')['Rating Score'].mean().reset_index()
-            avg_rating = avg_rating.sort_values(by=['Rating Score', 'Product Brand'], ascending=[False, True])
-            fig1 = px.bar(
-                avg_rating, x='Product Brand', y='Rating Score', 
-                title='Average Rating by Product Brand', 
-                labels={'Product Brand': 'Brand', 'Rating Score': 'Average Rating'},
-                color='Product Brand', color_discrete_sequence=px.colors.qualitative.Set1
-            )
-            fig1.update_layout(title_x=0.5, template='plotly_dark', xaxis_tickangle=-45, plot_bgcolor='#194d61')
             st.plotly_chart(fig1, use_container_width=True)
-
-            # Bar Chart: Average Price by Brand
-            avg_price = filtered_data.groupby('Product Brand')['Price (TL)'].mean().reset_index()
-            avg_price = avg_price.sort_values(by=['Price (TL)', 'Product Brand'], ascending=[False, True])
-            fig2 = px.bar(
-                avg_price, x='Product Brand', y='Price (TL)', 
-                title='Average Price by Product Brand', 
-                labels={'Product Brand': 'Brand', 'Price (TL)': 'Average Price (TL)'},
-                color='Product Brand', color_discrete_sequence=px.colors.qualitative.Set2
-            )
-            fig2.update_layout(title_x=0.5, template='plotly_dark', xaxis_tickangle=-45, plot_bgcolor='#194d61')
             st.plotly_chart(fig2, use_container_width=True)
-
-            # Bar Chart: Product Count by Brand
-            product_count = filtered_data['Product Brand'].value_counts().reset_index()
-            product_count.columns = ['Product Brand', 'Product Count']
-            product_count = product_count.sort_values(by='Product Count', ascending=False)
-            fig3 = px.bar(
-                product_count, x='Product Brand', y='Product Count', 
-                title='Product Count by Brand', 
-                labels={'Product Brand': 'Brand', 'Product Count': 'Number of Products'},
-                color='Product Brand', color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            fig3.update_layout(title_x=0.5, template='plotly_dark', xaxis_tickangle=-45, plot_bgcolor='#194d61')
             st.plotly_chart(fig3, use_container_width=True)
 
             # Display a table of top-rated products by brand
             st.subheader("Top Rated Products by Brand")
-            top_rated_products = filtered_data.loc[filtered_data.groupby('Product Brand')['Rating Score'].idxmax()]
-            top_rated_products = top_rated_products[['Product Brand', 'Product Name', 'Rating Score', 'Price (TL)']]
             st.write(top_rated_products)
 
         # Column 2: Product-focused visualizations
         with col2:
             st.subheader("Product Analysis")
-
-            # Scatter Plot: Price vs Rating
-            fig4 = px.scatter(
-                filtered_data, x='Price (TL)', y='Rating Score', 
-                color='Product Brand', size_max=10, 
-                title='Price vs Rating', 
-                labels={'Price (TL)': 'Price (TL)', 'Rating Score': 'Rating'}
-            )
-            fig4.update_layout(template='plotly_dark', plot_bgcolor='#194d61')
+            fig4 = scatter_figure(engine, version, filters)
             st.plotly_chart(fig4, use_container_width=True)
-
-            # Pie Chart: Product Share by Brand
-            product_share = filtered_data['Product Brand'].value_counts().reset_index()
-            product_share.columns = ['Product Brand', 'count']
-            product_share = product_share.sort_values(by='Product Brand', ascending=True)
-            fig5 = px.pie(
-                product_share, names='Product Brand', values='count', 
-                title='Product Share by Brand', 
-                color='Product Brand', color_discrete_sequence=px.colors.qualitative.Pastel
-            )
-            fig5.update_layout(title_x=0.5, template='plotly_dark')
             st.plotly_chart(fig5, use_container_width=True)
-            
-            # Box Plot: Price Distribution by Brand
-            fig6 = px.box(
-                filtered_data, x='Product Brand', y='Price (TL)', 
-                title='Price Distribution by Brand', 
-                labels={'Product Brand': 'Brand', 'Price (TL)': 'Price (TL)'},
-                color='Product Brand', color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            fig6.update_layout(template='plotly_dark', xaxis_tickangle=-45, plot_bgcolor='#194d61')
             st.plotly_chart(fig6, use_container_width=True)
 
             # Correlation Heatmap
             st.subheader("Correlation Analysis")
-            fig7, ax7 = plt.subplots(figsize=(8, 6))
-            correlation = filtered_data[['Price (TL)', 'Rating Score', 'Rating Count']].corr()
-            sns.heatmap(correlation, annot=True, cmap='coolwarm', ax=ax7, vmin=-1, vmax=1)
-            ax7.set_title("Correlation Heatmap", fontsize=16)
-            ax7.set_facecolor('#194d61')
-            st.pyplot(fig7)
+            heatmap_png = correlation_heatmap_png(engine, version, filters)
+            st.image(heatmap_png)
+
+        # Size of what each chart sends to the browser, which should stay bounded however many
+        # products were collected
+        with st.sidebar.expander("Chart payloads"):
+            charts = {
+                'Average Rating': fig1, 'Average Price': fig2, 'Product Count': fig3,
+                'Price vs Rating': fig4, 'Product Share': fig5, 'Price Distribution': fig6,
+            }
+            payloads = chart_payloads(charts, version, filters)
+            payloads['Correlation Heatmap'] = round(len(heatmap_png) / 1024, 1)
+            st.dataframe(payloads, use_container_width=True)
 
 elif page == "Cleaned Data":
     st.markdown("<h1 style='text-align: center; color: #2c3e50;'>Cleaned Data</h1>", unsafe_allow_html=True)
     if 'cleaned_data' in st.session_state:
-        # Display the cleaned data in a table
-        st.dataframe(st.session_state.cleaned_data, use_container_width=True)
+        from src import analytics
+
+        cleaned_data = st.session_state.cleaned_data
+        if 'cleaned_data_version' not in st.session_state:
+            st.session_state.cleaned_data_version = analytics.dataset_version(cleaned_data)
+        # The rows stay on the server, only the visible page is sent to the browser
+        view = table_view(st.session_state.dataset_key)
+        if view is None:
+            st.rerun()
+
+        search_col, brand_col, sort_col, order_col = st.columns([3, 3, 2, 1])
+        search = search_col.text_input("Search", placeholder="Brand, name or description")
+        brands = brand_col.multiselect("Brands", view.brands)
+        sort_by = sort_col.selectbox("Sort by", ["Original order"] + list(cleaned_data.columns))
+        ascending = order_col.radio("Order", ["Ascending", "Descending"]) == "Ascending"
+        positions = view.query(search, tuple(brands), None if sort_by == "Original order" else sort_by, ascending)
+
+        size_col, page_col, _ = st.columns([1, 1, 4])
+        page_size = size_col.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+        page_count = max(-(-len(positions) // page_size), 1)
+        page_number = page_col.number_input("Page", min_value=1, max_value=page_count, value=1)
+        offset = (page_number - 1) * page_size
+
+        # Display one page of the cleaned data in a table
+        st.dataframe(view.page(positions, offset, page_size), use_container_width=True)
+        st.caption(
+            f"Rows {min(offset + 1, len(positions)):,}-{min(offset + page_size, len(positions)):,} "
+            f"of {len(positions):,} matching, {len(view):,} in total. Page {page_number} of {page_count}."
+        )
@@ -0,0 +1,155 @@
+from typing import NamedTuple
+import hashlib
+import numpy as np
+import pandas as pd
+
+# The dashboard only analyses products with at least this many ratings
+MIN_RATING_COUNT = 75
+
+
+def dataset_version(df):
+    """Return a short hash identifying the content of a cleaned dataset."""
+    row_hashes = pd.util.hash_pandas_object(df, index=True).values
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()[:16]
+
+
+def filter_by_rating_count(df, min_rating_count=MIN_RATING_COUNT):
+    """Keep the products with at least min_rating_count ratings."""
+    return df[df["Rating Count"] >= min_rating_count]
+
+
+class Filters(NamedTuple):
+    """
+    Dashboard filters. None means no restriction, and the tuple can key caches.
+
+    runs selects stored scrape runs of the category. None keeps the runs of the collected dataset.
+    """
+    min_rating_count: int = MIN_RATING_COUNT
+    price_range: tuple = None
+    brands: tuple = None
+    runs: tuple = None
+
+    @property
+    def rating_only(self):
+        """Whether only the rating count threshold is set, which the brand summary is precomputed for."""
+        return self.price_range is None and not self.brands and not self.runs
+
+
+def apply_filters(df, filters):
+    """Keep the products matching all dashboard filters."""
+    mask = df["Rating Count"] >= filters.min_rating_count
+    if filters.price_range is not None:
+        mask &= df["Price (TL)"].between(*filters.price_range)
+    if filters.brands:
+        mask &= df["Product Brand"].isin(filters.brands)
+    if filters.runs and "Run" in df.columns:
+        mask &= df["Run"].isin(filters.runs)
+    return df[mask]
+
+
+def top_rated_by_brand(df):
+    """Return the best rated product of every brand."""
+    top_rated_products = df.loc[df.groupby("Product Brand", observed=True)["Rating Score"].idxmax()]
+    return top_rated_products[["Product Brand", "Product Name", "Rating Score", "Price (TL)"]]
+
+
+def correlation(df):
+    """Return the correlation matrix of price, rating and rating count."""
+    return df[["Price (TL)", "Rating Score", "Rating Count"]].corr()
+
+
+# Rating count thresholds the brand summary is precomputed for
+RATING_COUNT_THRESHOLDS = (0, 10, 25, 50, 75, 100, 250, 500, 1000)
+
+
+def _brand_summary_at(df, min_rating_count):
+    """Summarize the products with at least min_rating_count ratings per brand."""
+    filtered = filter_by_rating_count(df, min_rating_count)
+    groups = filtered.groupby("Product Brand", observed=True)
+    prices = groups["Price (TL)"]
+    summary = pd.DataFrame({
+        "Product Count": groups.size(),
+        "Average Rating": groups["Rating Score"].mean(),
+        "Average Price (TL)": prices.mean(),
+        "Price Min": prices.min(),
+        "Price Q1": prices.quantile(0.25),
+        "Price Median": prices.median(),
+        "Price Q3": prices.quantile(0.75),
+        "Price Max": prices.max(),
+    })
+
+    # Box plot whiskers reach the most extreme prices within 1.5 IQR of the quartiles
+    iqr = summary["Price Q3"] - summary["Price Q1"]
+    brands = filtered["Product Brand"]
+    low = (summary["Price Q1"] - 1.5 * iqr).reindex(brands).to_numpy()
+    high = (summary["Price Q3"] + 1.5 * iqr).reindex(brands).to_numpy()
+    inside = filtered[(filtered["Price (TL)"] >= low) & (filtered["Price (TL)"] <= high)]
+    inside_prices = inside.groupby("Product Brand", observed=True)["Price (TL)"]
+    summary["Price Lower Fence"] = inside_prices.min()
+    summary["Price Upper Fence"] = inside_prices.max()
+
+    top_rated = top_rated_by_brand(filtered).set_index("Product Brand")
+    summary["Top Product Name"] = top_rated["Product Name"]
+    summary["Top Product Rating"] = top_rated["Rating Score"]
+    summary["Top Product Price (TL)"] = top_rated["Price (TL)"]
+
+    summary = summary.reset_index()
+    summary["Product Brand"] = summary["Product Brand"].astype(str)
+    summary.insert(0, "Min Rating Count", min_rating_count)
+    return summary
+
+
+def brand_summary(df, thresholds=RATING_COUNT_THRESHOLDS):
+    """
+    Precompute the brand level metrics of the dashboard for every rating count threshold.
+
+    The result has one row per (threshold, brand) with product count, mean rating and price,
+    the price quartiles and whiskers of the box plot and the top rated product, so the
+    charts can be drawn from a few hundred rows however many products were collected.
+    """
+    return pd.concat([_brand_summary_at(df, threshold) for threshold in thresholds], ignore_index=True)
+
+
+def filtered_brand_summary(df, filters):
+    """Summarize the products matching the dashboard filters per brand, like brand_summary does."""
+    return _brand_summary_at(apply_filters(df, filters), filters.min_rating_count)
+
+
+def summary_at(summary, df, min_rating_count):
+    """Return the brand summary rows of a threshold, computing them from df if not precomputed."""
+    if summary is not None and min_rating_count in set(summary["Min Rating Count"]):
+        return summary[summary["Min Rating Count"] == min_rating_count]
+    return _brand_summary_at(df, min_rating_count)
+
+
+# Largest number of points the price vs rating scatter plot sends to the browser
+SCATTER_MAX_POINTS = 5000
+
+
+def density_sample(df, x, y, max_points=SCATTER_MAX_POINTS, bins=50, seed=0):
+    """
+    Sample rows for a scatter plot while keeping the shape of the point cloud.
+
+    The (x, y) plane is cut into bins x bins cells and every cell keeps a share of its rows
+    proportional to its density, rounded up, so sparse cells and outliers stay visible.
+    The result can therefore exceed max_points by at most the number of occupied cells.
+
+    Args:
+        df (pd.DataFrame): Rows to sample.
+        x (str): Column drawn on the x axis.
+        y (str): Column drawn on the y axis.
+        max_points (int): Number of rows to aim for. Frames this small are returned as is.
+        bins (int): Cells per axis.
+        seed (int): Seed of the sampling, so the same data always gives the same plot.
+
+    Returns:
+        pd.DataFrame: The sampled rows, in their original order.
+    """
+    if len(df) <= max_points:
+        return df
+    cells = (pd.cut(df[x], bins, labels=False) * bins + pd.cut(df[y], bins, labels=False)).to_numpy()
+    order = np.random.default_rng(seed).permutation(len(df))
+    shuffled = pd.Series(cells[order])
+    quota = np.ceil(shuffled.map(shuffled.value_counts()) * max_points / len(df))
+    keep = order[(shuffled.groupby(shuffled).cumcount() < quota).to_numpy()]
+    return df.iloc[np.sort(keep)]
@@ -1,46 +1,157 @@
+from contextlib import contextmanager
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import logging
+import os
+import sqlite3
+import time
+
+from src import analytics
+from src.dataset_store import RAW_COLUMNS, DatasetStore
+
+# Columns without which a row is useless for the analysis
+CRITICAL_COLUMNS = ["Product Brand", "Product Name", "Price (TL)"]
+
+# Columns the brand summary is computed from
+SUMMARY_COLUMNS = ["Product Brand", "Product Name", "Rating Score", "Rating Count", "Price (TL)"]
+
+# Compact dtypes of the cleaned frame. Brands and run keys repeat a lot and become categoricals,
+# free text is kept as Arrow strings, and ratings fit into 32 bit numbers.
+COMPACT_DTYPES = {
+    "Product Brand": "category",
+    "Product Name": "string[pyarrow]",
+    "Product Description": "string[pyarrow]",
+    "Rating Score": "float32",
+    "Rating Count": "int32",
+    "Category": "category",
+    "Run": "category",
+}
+
+
+def brand_summary_path(output_path):
+    """Return the Parquet file the brand summary of a cleaned CSV file is saved to, next to it."""
+    return f"{os.path.splitext(output_path)[0]}_brand_summary.parquet"
+
+
+class _BoundedReader:
+    """File-like view of an open binary file that stops reading at a given offset."""
+
+    def __init__(self, f, end):
+        self.f = f
+        self.end = end
+
+    def read(self, size=-1):
+        remaining = self.end - self.f.tell()
+        if remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.f.read(size)
+
 
 class DataCleaner:
-    def __init__(self, file_path="data/raw_data.csv"):
+    def __init__(self, file_path="data/raw_data.csv", store_dir=None, categories=None, runs=None,
+                 compact_dtypes=True, summary_path=None):
         """
         Initialize the DataCleaner
 
         Args:
             file_path (str): Path to the raw data CSV file. Defaults to 'raw_data.csv'.
+            store_dir (str | None): Root of a DatasetStore to read the raw data from instead of file_path.
+            categories (list[str] | None): Category partitions to read from the store. None reads all.
+            runs (list[str] | None): Run partitions to read from the store. None reads all.
+            compact_dtypes (bool): Convert the cleaned frame to COMPACT_DTYPES to save memory.
+            summary_path (str | None): Parquet file the brand summary of the cleaned data is saved to.
+                clean() saves it only when set, clean_incremental() defaults to a file next to its output.
         """
         self.file_path = file_path
+        self.store_dir = store_dir
+        self.categories = categories
+        self.runs = runs
+        self.compact_dtypes = compact_dtypes
+        self.summary_path = summary_path
         self.df = None
-        
+        self.summary = None
+        self.timings = {}
+
         # Set up logging
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
         self.logger.info("DataCleaner initialized.")
 
+    @staticmethod
+    def _format_ratings(df):
+        """Format 'Rating Score' as float and 'Rating Count' as int, replacing missing values with 0."""
+        df["Rating Score"] = pd.to_numeric(df["Rating Score"], errors="coerce").fillna(0).astype(float)
+        df["Rating Count"] = pd.to_numeric(df["Rating Count"], errors="coerce").fillna(0).astype(int)
+        return df
+
+    @staticmethod
+    def _dedup_columns(df):
+        """Return the product columns duplicates are detected on, leaving out the run partition keys."""
+        return [c for c in RAW_COLUMNS if c in df.columns]
+
+    @staticmethod
+    def _format_price(df):
+        """Convert 'Price (TL)' from the Turkish '12.999,50 TL' notation to float."""
+        # Arrow compute kernels parse the whole column without intermediate object Series:
+        # drop the thousands separators and everything after the first space, then fix the decimal separator
+        prices = pa.array(df["Price (TL)"], type=pa.string(), from_pandas=True)
+        prices = pc.replace_substring_regex(prices, r"\.| .*", "")
+        prices = pc.replace_substring(prices, ",", ".")
+        prices = pc.cast(prices, pa.float64()).to_numpy(zero_copy_only=False)
+        df["Price (TL)"] = pd.Series(prices, index=df.index).fillna(0)  # Replace missing prices with 0
+        return df
+
+    @staticmethod
+    def _compact(df):
+        """Convert the cleaned frame to COMPACT_DTYPES."""
+        return df.astype({column: dtype for column, dtype in COMPACT_DTYPES.items() if column in df.columns})
+
+    @staticmethod
+    def _memory_mb(df):
+        return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+    @contextmanager
+    def _timed(self, step):
+        """Record the wall-clock time of a cleaning step in self.timings."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[step] = time.perf_counter() - started
+
     def clean(self):
         """
         Load, clean, and save the data from the specified file path.
         """
+        self.timings = {}
+        source = self.store_dir or self.file_path
         try:
             # Load data
-            self.df = pd.read_csv(self.file_path)
-            self.logger.info(f"Data loaded from {self.file_path}.")
+            with self._timed("load"):
+                if self.store_dir:
+                    self.df = DatasetStore(self.store_dir).read(categories=self.categories, runs=self.runs)
+                else:
+                    self.df = pd.read_csv(self.file_path)
+            self.logger.info(f"Data loaded from {source}.")
         except Exception as e:
-            self.logger.error(f"Error loading data from {self.file_path}: {e}")
+            self.logger.error(f"Error loading data from {source}: {e}")
             return
-        
+
         try:
-            # Format the 'Rating Score' column correctly (replace NaN with 0)
-            self.df["Rating Score"] = pd.to_numeric(self.df["Rating Score"], errors="coerce").fillna(0).astype(float)
-            self.logger.info("'Rating Score' column formatted.")
+            memory_before = self._memory_mb(self.df)
 
-            # Format the 'Rating Count' column as an int
-            self.df["Rating Count"] = pd.to_numeric(self.df["Rating Count"], errors="coerce").fillna(0).astype(int)
-            self.logger.info("'Rating Count' column formatted.")
+            # Format the 'Rating Score' and 'Rating Count' columns correctly (replace NaN with 0)
+            with self._timed("format_ratings"):
+                self.df = self._format_ratings(self.df)
+            self.logger.info("'Rating Score' and 'Rating Count' columns formatted.")
 
             # Remove rows with missing critical values
             rows_before_drop = len(self.df)
-            self.df = self.df.dropna(subset=["Product Brand", "Product Name", "Price (TL)"])
+            with self._timed("drop_missing"):
+                self.df = self.df.dropna(subset=CRITICAL_COLUMNS)
             rows_after_drop = len(self.df)
             rows_dropped = rows_before_drop - rows_after_drop
             if rows_dropped > 0:
@@ -48,9 +159,10 @@ class DataCleaner:
             else:
                 self.logger.info("No rows with missing critical values were found.")
 
-            # Check and remove duplicate rows
+            # Check and remove duplicate rows, keeping the latest run of a product seen in several runs
             rows_before_drop_duplicates = len(self.df)
-            self.df = self.df.drop_duplicates()
+            with self._timed("drop_duplicates"):
+                self.df = self.df.drop_duplicates(subset=self._dedup_columns(self.df), keep="last")
             rows_after_drop_duplicates = len(self.df)
             rows_dropped_duplicates = rows_before_drop_duplicates - rows_after_drop_duplicates
             if rows_dropped_duplicates > 0:
@@ -59,18 +171,177 @@ class DataCleaner:
                 self.logger.info("No duplicate rows found.")
 
             # Format the 'Price (TL)' column correctly
-            self.df["Price (TL)"] = (
-                self.df["Price (TL)"]
-                .str.replace(".", "", regex=False)  # Remove the thousands separator
-                .str.replace(",", ".", regex=False)  # Correct the decimal separator
-                .str.split(" ")
-                .str[0]  # Take the first part before any spaces
-                .fillna(0)  # Replace empty strings with 0
-                .astype(float)  # Convert to float type
-            )
+            with self._timed("format_price"):
+                self.df = self._format_price(self.df)
             self.logger.info("'Price (TL)' column formatted.")
-            
+
+            # Shrink the frame to compact dtypes
+            if self.compact_dtypes:
+                with self._timed("compact_dtypes"):
+                    self.df = self._compact(self.df)
+
+            # Precompute the brand metrics the dashboard shows, next to the cleaned data
+            with self._timed("brand_summary"):
+                self.summary = analytics.brand_summary(self.df)
+                if self.summary_path:
+                    self._save_summary(self.summary_path)
+            self.logger.info(f"Brand summary with {len(self.summary)} rows created.")
+            self.logger.info(
+                f"Memory usage went from {memory_before:.2f} MB to {self._memory_mb(self.df):.2f} MB. Step timings: "
+                + ", ".join(f"{step} {seconds * 1000:.1f} ms" for step, seconds in self.timings.items())
+            )
+
             return self.df
-        
+
         except Exception as e:
-            self.logger.error(f"Error during cleaning process: {e}")
\ No newline at end of file
+            self.logger.error(f"Error during cleaning process: {e}")
+
+    def _save_summary(self, summary_path):
+        os.makedirs(os.path.dirname(summary_path) or ".", exist_ok=True)
+        self.summary.to_parquet(summary_path, index=False)
+        self.logger.info(f"Brand summary saved to {summary_path}.")
+
+    @staticmethod
+    def _csv_summary(path):
+        """Compute the brand summary of a cleaned CSV file, in DuckDB when it is installed."""
+        from src.query_engine import DUCKDB_AVAILABLE, csv_brand_summary
+
+        if DUCKDB_AVAILABLE:
+            return csv_brand_summary(path)
+        return analytics.brand_summary(pd.read_csv(path, usecols=SUMMARY_COLUMNS))
+
+    def _open_state(self, state_path):
+        """Open the incremental state database holding the watermarks and the key index."""
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+        db = sqlite3.connect(state_path)
+        with db:
+            # The inode tells a replaced raw CSV from the one the watermark was taken in
+            db.execute("CREATE TABLE IF NOT EXISTS watermarks (source TEXT PRIMARY KEY, value INTEGER NOT NULL, "
+                       "inode INTEGER)")
+            # Runs are written in several files, by every flush of the scraper and by resumed runs,
+            # so cleaned input is tracked per file
+            db.execute("CREATE TABLE IF NOT EXISTS cleaned_files (path TEXT PRIMARY KEY)")
+            db.execute("CREATE TABLE IF NOT EXISTS row_keys (key INTEGER PRIMARY KEY)")
+        return db
+
+    def _iter_new_csv_chunks(self, db, chunksize):
+        """Yield chunks of the rows appended to the raw CSV since the last watermark."""
+        source = os.path.abspath(self.file_path)
+        row = db.execute("SELECT value, inode FROM watermarks WHERE source = ?", (source,)).fetchone()
+        columns = pd.read_csv(self.file_path, nrows=0).columns.tolist()
+
+        with open(self.file_path, "rb") as f:
+            header_end = len(f.readline())
+            stat = os.fstat(f.fileno())
+            start = header_end
+            if row:
+                watermark, inode = row
+                if watermark > stat.st_size or (inode is not None and inode != stat.st_ino):
+                    # Offsets into the old file mean nothing in a truncated or replaced one. Rows
+                    # cleaned before are still dropped by the key index
+                    self.logger.warning(f"{self.file_path} was truncated or replaced, cleaning it from the start.")
+                    with db:
+                        db.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)",
+                                   (source, header_end, stat.st_ino))
+                else:
+                    start = watermark
+            # Only read up to the last complete line, the scraper may be appending right now
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            while end > start:
+                f.seek(max(start, end - 4096))
+                block = f.read(end - f.tell())
+                newline = block.rfind(b"\n")
+                if newline >= 0:
+                    end = end - len(block) + newline + 1
+                    break
+                end -= len(block)
+            if end <= start:
+                return
+
+            f.seek(start)
+            yield from pd.read_csv(_BoundedReader(f, end), header=None, names=columns, chunksize=chunksize)
+        # The whole new region was merged, move the watermark behind it
+        with db:
+            db.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)", (source, end, stat.st_ino))
+
+    def _iter_new_store_chunks(self, db, chunksize):
+        """Yield chunks of the store files that were not cleaned yet."""
+        store = DatasetStore(self.store_dir)
+        categories = self.categories if self.categories is not None else store.categories()
+        for category in categories:
+            for run in store.runs(category):
+                if self.runs is not None and run not in self.runs:
+                    continue
+                for path in store.run_files(category, run):
+                    if db.execute("SELECT 1 FROM cleaned_files WHERE path = ?", (path,)).fetchone():
+                        continue
+                    df = store.read_files([path])
+                    for start in range(0, len(df), chunksize):
+                        yield df.iloc[start:start + chunksize].copy()
+                    with db:
+                        db.execute("INSERT INTO cleaned_files VALUES (?)", (path,))
+
+    def _new_rows(self, db, chunk):
+        """Drop rows of a chunk that were already cleaned before, using the persistent key index."""
+        # A 64 bit hash of the product columns stands in for the full row in the index
+        keys = pd.util.hash_pandas_object(chunk[self._dedup_columns(chunk)], index=False).astype("int64")
+        chunk = chunk.assign(_key=keys.values).drop_duplicates(subset="_key", keep="last")
+
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS chunk_keys (key INTEGER PRIMARY KEY)")
+        db.execute("DELETE FROM chunk_keys")
+        db.executemany("INSERT INTO chunk_keys VALUES (?)", ((int(key),) for key in chunk["_key"]))
+        known = {key for (key,) in db.execute("SELECT key FROM chunk_keys WHERE key IN (SELECT key FROM row_keys)")}
+        chunk = chunk[~chunk["_key"].isin(known)]
+        db.executemany("INSERT INTO row_keys VALUES (?)", ((int(key),) for key in chunk["_key"]))
+        return chunk.drop(columns="_key")
+
+    def clean_incremental(self, output_path="data/cleaned_data.csv", state_path="data/cleaner_state.sqlite",
+                          chunksize=100_000):
+        """
+        Clean only the raw rows added since the previous call and append them to the cleaned output.
+
+        A watermark (byte offset into the raw CSV, or the set of cleaned store files) marks the input
+        that was already cleaned, and an on-disk index of row keys replaces the full-frame
+        deduplication, so memory stays bounded by the chunk size however large the history grows.
+        The brand summary of the whole cleaned output is recomputed whenever rows were appended and
+        saved to summary_path, by default next to the output.
+
+        Args:
+            output_path (str): CSV file the cleaned rows are appended to.
+            state_path (str): SQLite file holding the watermarks and the key index.
+            chunksize (int): Number of raw rows cleaned at once.
+
+        Returns:
+            int | None: Number of cleaned rows appended, or None if cleaning failed.
+        """
+        db = self._open_state(state_path)
+        appended = 0
+        try:
+            chunks = self._iter_new_store_chunks(db, chunksize) if self.store_dir else \
+                self._iter_new_csv_chunks(db, chunksize)
+            for chunk in chunks:
+                chunk = self._format_ratings(chunk).dropna(subset=CRITICAL_COLUMNS)
+                with db:
+                    chunk = self._new_rows(db, chunk)
+                    if chunk.empty:
+                        continue
+                    chunk = self._format_price(chunk)
+                    chunk.to_csv(output_path, mode="a", header=not os.path.exists(output_path),
+                                 index=False, encoding="utf-8")
+                appended += len(chunk)
+                self.logger.info(f"{len(chunk)} new cleaned rows appended to {output_path}.")
+
+            summary_path = self.summary_path or brand_summary_path(output_path)
+            if os.path.exists(output_path) and (appended or not os.path.exists(summary_path)):
+                with self._timed("brand_summary"):
+                    self.summary = self._csv_summary(output_path)
+                    self._save_summary(summary_path)
+        except Exception as e:
+            self.logger.error(f"Error during incremental cleaning: {e}")
+            return None
+        finally:
+            db.close()
+
+        self.logger.info(f"Incremental cleaning completed. {appended} new rows.")
+        return appended
@@ -0,0 +1,215 @@
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+import asyncio
+import logging
+import random
+import threading
+import time
+
+# Statuses that signal throttling or a transient server problem and are worth retrying
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds requested by a Retry-After header, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=30.0):
+        """
+        Initialize the RetryPolicy
+
+        Args:
+            max_retries (int): Retries after the first attempt before a page is given up.
+            base_delay (float): Backoff ceiling of the first retry in seconds, doubled on every retry.
+            max_delay (float): Upper bound of a single backoff in seconds. A longer Retry-After
+                is still waited for.
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, retry_after=None):
+        """Return the jittered exponential backoff before retry number attempt + 1."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        # Never retry earlier than the server asked us to
+        if retry_after is not None:
+            return max(backoff, retry_after)
+        return backoff
+
+
+class AimdController:
+    def __init__(self, initial, max_limit, min_limit=1, adaptive=True, latency_factor=3.0):
+        """
+        Initialize the AimdController
+
+        Limits the number of in-flight requests. When adaptive, the limit grows by about one
+        request per round trip while responses are fast, and is halved on throttling (429/5xx,
+        timeouts) or when latency rises well above the fastest latency seen so far. A server's
+        Retry-After pauses all requests of the controller for that long.
+
+        Args:
+            initial (int): Starting number of in-flight requests.
+            max_limit (int): Upper bound of in-flight requests.
+            min_limit (int): Lower bound of in-flight requests.
+            adaptive (bool): Keep the limit fixed at 'initial' when False.
+            latency_factor (float): Latency, relative to the baseline, treated as congestion.
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.peak_limit = self.limit
+        self.adaptive = adaptive
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+
+        self._latency = None
+        self._baseline_latency = None
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+        self._async_condition = None
+
+    def _has_room(self):
+        return self.in_flight < int(self.limit)
+
+    def _pause_left(self):
+        return self._paused_until - time.monotonic()
+
+    def pause(self, seconds):
+        """Hold back every new request for the given seconds, as a server's Retry-After asks."""
+        with self._condition:
+            if time.monotonic() + seconds > self._paused_until:
+                self._paused_until = time.monotonic() + seconds
+                logging.warning(f"Requests paused for {seconds:.0f}s as the server asked.")
+
+    @contextmanager
+    def slot(self):
+        """Hold one in-flight request slot, blocking the thread until one is free."""
+        with self._condition:
+            while (pause_left := self._pause_left()) > 0 or not self._has_room():
+                self._condition.wait(pause_left if pause_left > 0 else None)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """Hold one in-flight request slot, waiting on the event loop until one is free."""
+        if self._async_condition is None:
+            self._async_condition = asyncio.Condition()
+        while (pause_left := self._pause_left()) > 0:
+            await asyncio.sleep(pause_left)
+        async with self._async_condition:
+            await self._async_condition.wait_for(self._has_room)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._async_condition:
+                self.in_flight -= 1
+                self._async_condition.notify_all()
+
+    def on_success(self, latency):
+        """Record a successful request and its latency."""
+        if not self.adaptive:
+            return
+        with self._condition:
+            self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+            if self._baseline_latency is None or self._latency < self._baseline_latency:
+                self._baseline_latency = self._latency
+
+            if self._latency > self.latency_factor * self._baseline_latency:
+                self._decrease("latency rising")
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self.peak_limit = max(self.peak_limit, self.limit)
+                # Async waiters re-check the limit whenever a slot is released
+                self._condition.notify_all()
+
+    def on_throttle(self):
+        """Record a throttled, failed or timed out request."""
+        if not self.adaptive:
+            return
+        with self._condition:
+            self._decrease("throttled")
+
+    def _decrease(self, reason):
+        # Back off at most once per round trip so one burst of errors does not collapse the limit
+        now = time.monotonic()
+        if now - self._last_decrease < (self._latency or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit / 2)
+        logging.info(f"Concurrency lowered to {int(self.limit)} ({reason}).")
+
+
+class CrawlReport:
+    def __init__(self):
+        """Collect what happened to the requests of one scrape run."""
+        self.started_at = time.time()
+        self.finished_at = None
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failed_pages = {}
+        self.final_concurrency = None
+        self.peak_concurrency = None
+        self._lock = threading.Lock()
+
+    def request_sent(self):
+        with self._lock:
+            self.requests += 1
+
+    def retry_scheduled(self, status):
+        with self._lock:
+            self.retries += 1
+            if status == 429:
+                self.throttled += 1
+
+    def page_failed(self, url, error, attempts):
+        """Record a page that could not be fetched even after retrying."""
+        with self._lock:
+            self.failed_pages[url] = {"error": error, "attempts": attempts}
+
+    def finish(self, controller):
+        """Close the report with the controller's final state."""
+        self.finished_at = time.time()
+        self.final_concurrency = int(controller.limit)
+        self.peak_concurrency = int(controller.peak_limit)
+
+    def to_dict(self):
+        """Return the report as a JSON serializable dict."""
+        return {
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "final_concurrency": self.final_concurrency,
+            "peak_concurrency": self.peak_concurrency,
+            "failed_pages": self.failed_pages,
+        }
+
+    def log_summary(self):
+        """Log the outcome of the run."""
+        logging.info(
+            f"{self.requests} requests, {self.retries} retries ({self.throttled} throttled), "
+            f"concurrency peaked at {self.peak_concurrency} and ended at {self.final_concurrency}."
+        )
+        if self.failed_pages:
+            logging.error(f"{len(self.failed_pages)} pages failed for good: {', '.join(self.failed_pages)}")
@@ -0,0 +1,205 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+# Per-request timings collected for every fetched page, in milliseconds
+TIMING_FIELDS = ("connect_ms", "tls_ms", "ttfb_ms", "download_ms", "total_ms")
+PERCENTILES = (50, 95, 99)
+PHASE_NAMES = {
+    "connect_ms": "TCP connect",
+    "tls_ms": "TLS handshake",
+    "ttfb_ms": "time to first byte",
+    "download_ms": "body download",
+    "total_ms": "request",
+    "parse_ms": "parse",
+}
+
+
+def percentile(values, q):
+    """Return the q-th percentile of values by the nearest-rank method, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+
+
+class HttpxTrace:
+    """
+    Trace callback for httpx's 'trace' request extension that timestamps connection and
+    request phases, so a response can be split into connect, TLS, TTFB and download times.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.events = {}
+
+    async def __call__(self, event_name, info):
+        # Events look like 'connection.connect_tcp.complete' or 'http2.receive_response_body.started'
+        _, step, phase = event_name.rsplit(".", 2)
+        self.events[f"{step}.{phase}"] = time.monotonic()
+
+    def _span(self, step, start="started", end="complete"):
+        start_at, end_at = self.events.get(f"{step}.{start}"), self.events.get(f"{step}.{end}")
+        return None if start_at is None or end_at is None else (end_at - start_at) * 1000
+
+    def timings(self):
+        """Return the phase timings in ms. Phases that did not happen, like connecting on a reused connection, are None."""
+        finished = time.monotonic()
+        ttfb_start = self.events.get("send_request_headers.started")
+        headers_done = self.events.get("receive_response_headers.complete")
+        return {
+            "connect_ms": self._span("connect_tcp"),
+            "tls_ms": self._span("start_tls"),
+            "ttfb_ms": None if ttfb_start is None or headers_done is None else (headers_done - ttfb_start) * 1000,
+            "download_ms": None if headers_done is None else (finished - headers_done) * 1000,
+            "total_ms": (finished - self.started) * 1000,
+        }
+
+
+class CrawlMetrics:
+    def __init__(self):
+        """Collect structured timings of every page of one scrape run."""
+        self.started_at = time.time()
+        self.finished_at = None
+        self.pages = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def _page(self, url):
+        return self.pages.setdefault(url, {"url": url})
+
+    def fetched(self, url, status, timings, size, from_cache=False):
+        """Record the successful request of a page, or its reuse from the page cache."""
+        with self._lock:
+            page = self._page(url)
+            page.update(timings)
+            page.update({"status": status, "bytes": size, "from_cache": from_cache})
+
+    def request_failed(self, status=None):
+        """Count a failed request attempt by its HTTP status, or as a network error."""
+        kind = str(status) if status is not None else "network"
+        with self._lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def page_failed(self, url):
+        """Mark a page whose retries were exhausted."""
+        with self._lock:
+            self._page(url)["failed"] = True
+
+    def parsed(self, url, seconds, products):
+        """Record how long parsing a page took and how many products it had."""
+        with self._lock:
+            page = self._page(url)
+            page.update({"parse_ms": None if seconds is None else seconds * 1000, "products": products})
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    def summary(self, slowest=5):
+        """
+        Aggregate the run into latency percentiles, throughput and error counts.
+
+        Returns:
+            dict: A JSON serializable summary, rendered for Prometheus by prometheus_text.
+        """
+        with self._lock:
+            pages = [dict(page) for page in self.pages.values()]
+            errors = dict(self.errors)
+        duration = (self.finished_at or time.time()) - self.started_at
+        fetched = [page for page in pages if "status" in page and not page["from_cache"]]
+
+        latency = {}
+        for field in TIMING_FIELDS + ("parse_ms",):
+            source = pages if field == "parse_ms" else fetched
+            values = [page[field] for page in source if page.get(field) is not None]
+            latency[field] = {f"p{q}": percentile(values, q) for q in PERCENTILES}
+            latency[field].update({"max": max(values, default=None), "count": len(values), "sum": sum(values)})
+
+        products = sum(page.get("products") or 0 for page in pages)
+        size = sum(page.get("bytes") or 0 for page in fetched)
+        return {
+            "started_at": self.started_at,
+            "duration_s": duration,
+            "pages": len(pages),
+            "fetched_pages": len(fetched),
+            "cache_hits": sum(1 for page in pages if page.get("from_cache")),
+            "failed_pages": sum(1 for page in pages if page.get("failed")),
+            "products": products,
+            "bytes": size,
+            "pages_per_sec": len(pages) / duration if duration else None,
+            "products_per_sec": products / duration if duration else None,
+            "bytes_per_sec": size / duration if duration else None,
+            "latency_ms": latency,
+            "errors": errors,
+            "slowest_pages": sorted(
+                (page for page in fetched if page.get("total_ms") is not None),
+                key=lambda page: page["total_ms"], reverse=True
+            )[:slowest],
+        }
+
+    def log_summary(self):
+        """Log the latency percentiles and throughput of the run."""
+        summary = self.summary()
+        total = summary["latency_ms"]["total_ms"]
+        if total["count"]:
+            logging.info(
+                f"Page latency p50 {total['p50']:.0f} ms, p95 {total['p95']:.0f} ms, p99 {total['p99']:.0f} ms. "
+                f"{summary['pages_per_sec']:.1f} pages/s, {summary['products_per_sec']:.0f} products/s."
+            )
+
+    def write(self, path):
+        """
+        Write the summary to a file, in Prometheus text format for '.prom' files and as JSON otherwise.
+
+        The file is replaced atomically, so a collector such as node_exporter's textfile collector
+        never reads it half-written.
+        """
+        summary = self.summary()
+        text = prometheus_text(summary) if path.endswith(".prom") else json.dumps(summary, indent=2)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        logging.info(f"Crawl metrics written to {path}")
+
+
+def _sample(value):
+    """Format a sample value exactly, integers like byte counts in full and floats round-trippable."""
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def prometheus_text(summary, prefix="trendyol_crawl"):
+    """Render a CrawlMetrics summary in the Prometheus text exposition format."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            if value is not None:
+                lines.append(f"{prefix}_{name}{labels} {_sample(value)}")
+
+    metric("pages", "gauge", "Pages finished in the last run.", [("", summary["pages"])])
+    metric("cache_hits", "gauge", "Pages served from the page cache in the last run.", [("", summary["cache_hits"])])
+    metric("failed_pages", "gauge", "Pages given up after retries in the last run.", [("", summary["failed_pages"])])
+    metric("products", "gauge", "Products extracted in the last run.", [("", summary["products"])])
+    metric("bytes", "gauge", "Bytes downloaded in the last run.", [("", summary["bytes"])])
+    metric("duration_seconds", "gauge", "Duration of the last run.", [("", summary["duration_s"])])
+    metric("pages_per_second", "gauge", "Page throughput of the last run.", [("", summary["pages_per_sec"])])
+    metric("errors", "gauge", "Failed request attempts of the last run by status.",
+           [(f'{{kind="{kind}"}}', count) for kind, count in sorted(summary["errors"].items())])
+
+    for field, stats in summary["latency_ms"].items():
+        name = field[:-len("_ms")] + "_seconds"
+        samples = [(f'{{quantile="{q / 100:g}"}}', None if stats[f"p{q}"] is None else stats[f"p{q}"] / 1000)
+                   for q in PERCENTILES]
+        metric(name, "summary", f"Per-page {PHASE_NAMES[field]} seconds of the last run.", samples)
+        lines.append(f"{prefix}_{name}_sum {_sample(stats['sum'] / 1000)}")
+        lines.append(f"{prefix}_{name}_count {stats['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,151 @@
+from collections import OrderedDict
+import logging
+import threading
+import time
+
+from src.jobs import DONE
+
+
+def normalize_key(base_url, max_pages):
+    """Return the registry key of a category URL and page count."""
+    return base_url.strip().rstrip("/"), int(max_pages)
+
+
+def result_bytes(result):
+    """Return the memory held by a job result's cleaned data."""
+    return int(result["cleaned_data"].memory_usage(deep=True).sum())
+
+
+def derived_bytes(value):
+    """Return the memory held by an object derived from a dataset, as its nbytes() reports it."""
+    nbytes = getattr(value, "nbytes", None)
+    return int(nbytes()) if callable(nbytes) else 0
+
+
+def dataset_bytes(dataset):
+    """Return the memory held by a kept dataset and the objects derived from it."""
+    return dataset["bytes"] + sum(derived_bytes(value) for value in dataset["derived"].values())
+
+
+class DatasetRegistry:
+    def __init__(self, job_manager, ttl=600, max_bytes=512 * 1024 * 1024):
+        """
+        Initialize the DatasetRegistry
+
+        Cleaned datasets are shared by every session of the process and keyed by
+        (category URL, page count). A request for a key whose dataset is younger than ttl
+        reuses it, a request for a key that is already being collected joins that job
+        (single-flight), and anything else starts a new job. Datasets are kept in LRU order
+        and the least recently used ones are dropped once their total size exceeds max_bytes.
+        Objects built from a dataset, such as its query engine, are kept with it by derived(),
+        so they count towards the budget and are dropped together with it.
+
+        Args:
+            job_manager (JobManager): Runs the scrape and clean jobs.
+            ttl (float): Seconds a collected dataset is reused before a request collects it again.
+            max_bytes (int): Memory budget of the kept datasets, measured with memory_usage(deep=True)
+                and the nbytes() of their derived objects.
+        """
+        self.job_manager = job_manager
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._datasets = OrderedDict()
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def request(self, base_url, max_pages):
+        """
+        Make sure a dataset for the category is available or being collected and return its key.
+
+        Args:
+            base_url (str): Category listing URL to scrape.
+            max_pages (int): Number of listing pages to scrape at most.
+
+        Returns:
+            tuple: The registry key to poll with job() and get().
+        """
+        key = normalize_key(base_url, max_pages)
+        with self._lock:
+            self._collect()
+            job = self._jobs.get(key)
+            if job is not None and not job.finished:
+                logging.info(f"Joining the running job {job.id} for {key}.")
+                return key
+            dataset = self._datasets.get(key)
+            if dataset is not None and time.time() - dataset["created_at"] < self.ttl:
+                logging.info(f"Reusing the dataset collected for {key}.")
+                return key
+            self._jobs[key] = self.job_manager.submit(*key)
+        return key
+
+    def job(self, key):
+        """Return the latest job of a key, running or finished, or None."""
+        with self._lock:
+            self._collect()
+            return self._jobs.get(key)
+
+    def get(self, key):
+        """Return the result dict of a key's dataset and mark it as recently used, or None."""
+        with self._lock:
+            self._collect()
+            dataset = self._datasets.get(key)
+            if dataset is None:
+                return None
+            self._datasets.move_to_end(key)
+            return dataset["result"]
+
+    def derived(self, key, name, build):
+        """
+        Return an object derived from a key's dataset, building it on first use.
+
+        Args:
+            key (tuple): Registry key of the dataset.
+            name (str): Name the object is kept under, e.g. 'query_engine'.
+            build (Callable[[dict], object]): Builds the object from the dataset's result dict.
+
+        Returns:
+            object | None: The derived object, or None if the key has no dataset.
+        """
+        with self._lock:
+            self._collect()
+            dataset = self._datasets.get(key)
+            if dataset is None:
+                return None
+            self._datasets.move_to_end(key)
+            if name in dataset["derived"]:
+                return dataset["derived"][name]
+
+        # Built outside the lock, so sessions using other datasets are not held up
+        value = build(dataset["result"])
+        with self._lock:
+            if self._datasets.get(key) is not dataset:
+                # Evicted or replaced meanwhile, the caller uses it once and nothing keeps it
+                return value
+            value = dataset["derived"].setdefault(name, value)
+            self._evict()
+        return value
+
+    def total_bytes(self):
+        """Return the memory held by the kept datasets and the objects derived from them."""
+        with self._lock:
+            return sum(dataset_bytes(dataset) for dataset in self._datasets.values())
+
+    def _collect(self):
+        """Move the results of finished jobs into the registry and enforce the memory budget."""
+        for key, job in self._jobs.items():
+            if job.status != DONE or job.result is None:
+                continue
+            result = job.release_result()
+            self._datasets.pop(key, None)
+            self._datasets[key] = {"result": result, "created_at": job.finished_at, "bytes": result_bytes(result),
+                                   "derived": {}}
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used datasets, never the newest one, until they fit the budget."""
+        sizes = {key: dataset_bytes(dataset) for key, dataset in self._datasets.items()}
+        total = sum(sizes.values())
+        while total > self.max_bytes and len(self._datasets) > 1:
+            key, dataset = self._datasets.popitem(last=False)
+            total -= sizes[key]
+            logging.info(f"Evicted the dataset of {key} ({sizes[key] / 1024 ** 2:.1f} MB) from the registry.")
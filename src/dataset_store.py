@@ -0,0 +1,168 @@
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import logging
+import os
+import uuid
+
+# Columns produced by the scraper, with the types they are stored as
+RAW_SCHEMA = pa.schema([
+    ("Product Brand", pa.string()),
+    ("Product Name", pa.string()),
+    ("Product Description", pa.string()),
+    ("Rating Score", pa.float64()),
+    ("Rating Count", pa.int64()),
+    ("Price (TL)", pa.string()),
+])
+RAW_COLUMNS = RAW_SCHEMA.names
+
+# Hive partition keys on disk and the column names they are exposed as
+PARTITIONING = ds.partitioning(pa.schema([("category", pa.string()), ("run", pa.string())]), flavor="hive")
+PARTITION_COLUMNS = {"category": "Category", "run": "Run"}
+
+
+def category_slug(url):
+    """Derive a category key such as 'cep-telefonu-x-c103498' from a listing URL."""
+    path = urlparse(url).path.strip("/")
+    return path.rsplit("/", 1)[-1] or urlparse(url).netloc
+
+
+def new_run_id():
+    """Return a sortable identifier for a scrape run, based on the current UTC time."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+class DatasetStore:
+    def __init__(self, root="data/store"):
+        """
+        Initialize the DatasetStore
+
+        Scraped rows are kept as Parquet files partitioned by category and run,
+        e.g. 'category=cep-telefonu-x-c103498/run=20241018T120000000000Z/part-<id>.parquet'.
+
+        Args:
+            root (str): Directory holding the partitions.
+        """
+        self.root = root
+
+    def write_run(self, data, category, run_id=None):
+        """
+        Write rows of a scrape run as a new Parquet file of its partition.
+
+        Args:
+            data (list[dict] | pd.DataFrame): Rows with the scraper's columns.
+            category (str): Category key of the rows.
+            run_id (str | None): Run the rows belong to. A new one is created when None.
+
+        Returns:
+            str: The run identifier.
+        """
+        run_id = run_id or new_run_id()
+        df = pd.DataFrame(data, columns=RAW_COLUMNS)
+        df["Rating Score"] = pd.to_numeric(df["Rating Score"], errors="coerce")
+        df["Rating Count"] = pd.to_numeric(df["Rating Count"], errors="coerce").astype("Int64")
+        table = pa.Table.from_pandas(df, schema=RAW_SCHEMA, preserve_index=False)
+
+        partition_dir = os.path.join(self.root, f"category={category}", f"run={run_id}")
+        os.makedirs(partition_dir, exist_ok=True)
+        file_name = f"part-{uuid.uuid4().hex}.parquet"
+        path = os.path.join(partition_dir, file_name)
+        # Write under a hidden temporary name so readers never see a half-written file
+        tmp_path = os.path.join(partition_dir, f".{file_name}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        logging.info(f"{len(df)} rows written to {path}")
+        return run_id
+
+    def _partition_values(self, key):
+        """List the values of a partition key from the directory names, without reading any file."""
+        values = set()
+        if not os.path.isdir(self.root):
+            return values
+        for category_dir in os.listdir(self.root):
+            if key == "category" and category_dir.startswith("category="):
+                values.add(category_dir.split("=", 1)[1])
+            elif key == "run" and os.path.isdir(os.path.join(self.root, category_dir)):
+                for run_dir in os.listdir(os.path.join(self.root, category_dir)):
+                    if run_dir.startswith("run="):
+                        values.add(run_dir.split("=", 1)[1])
+        return values
+
+    def categories(self):
+        """Return the stored category keys."""
+        return sorted(self._partition_values("category"))
+
+    def runs(self, category=None):
+        """Return the stored run identifiers, oldest first, optionally of one category."""
+        if category is None:
+            return sorted(self._partition_values("run"))
+        category_dir = os.path.join(self.root, f"category={category}")
+        if not os.path.isdir(category_dir):
+            return []
+        return sorted(name.split("=", 1)[1] for name in os.listdir(category_dir) if name.startswith("run="))
+
+    def run_files(self, category, run):
+        """Return the paths of the Parquet files of a run partition, relative to the root."""
+        partition = os.path.join(f"category={category}", f"run={run}")
+        partition_dir = os.path.join(self.root, partition)
+        if not os.path.isdir(partition_dir):
+            return []
+        # Hidden names are files still being written
+        return sorted(os.path.join(partition, name) for name in os.listdir(partition_dir)
+                      if name.endswith(".parquet") and not name.startswith("."))
+
+    def read_files(self, paths, columns=None):
+        """
+        Read the given Parquet files of the store as a DataFrame.
+
+        Args:
+            paths (list[str]): File paths relative to the root, as returned by run_files.
+            columns (list[str] | None): Columns to load, including 'Category' and 'Run'. None loads all.
+
+        Returns:
+            pd.DataFrame: The rows, with the partition keys as 'Category' and 'Run' columns.
+        """
+        all_columns = RAW_COLUMNS + list(PARTITION_COLUMNS.values())
+        columns = list(columns) if columns is not None else all_columns
+        if not paths:
+            return pd.DataFrame(columns=columns)
+        partition_names = {value: key for key, value in PARTITION_COLUMNS.items()}
+        dataset = ds.dataset([os.path.join(self.root, path) for path in paths], format="parquet",
+                             partitioning=PARTITIONING, partition_base_dir=self.root)
+        table = dataset.to_table(columns=[partition_names.get(c, c) for c in columns])
+        return table.to_pandas().rename(columns=PARTITION_COLUMNS)
+
+    def read(self, columns=None, categories=None, runs=None):
+        """
+        Read stored rows as a DataFrame.
+
+        Only the requested columns are decoded, and partitions outside the requested
+        categories and runs are skipped without being opened.
+
+        Args:
+            columns (list[str] | None): Columns to load, including 'Category' and 'Run'. None loads all.
+            categories (list[str] | None): Category keys to load. None loads all.
+            runs (list[str] | None): Run identifiers to load. None loads all.
+
+        Returns:
+            pd.DataFrame: The rows, with the partition keys as 'Category' and 'Run' columns.
+        """
+        all_columns = RAW_COLUMNS + list(PARTITION_COLUMNS.values())
+        columns = list(columns) if columns is not None else all_columns
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns)
+
+        dataset = ds.dataset(self.root, format="parquet", partitioning=PARTITIONING)
+        partition_names = {value: key for key, value in PARTITION_COLUMNS.items()}
+
+        expression = None
+        for key, values in (("category", categories), ("run", runs)):
+            if values is not None:
+                condition = ds.field(key).isin(list(values))
+                expression = condition if expression is None else expression & condition
+
+        table = dataset.to_table(columns=[partition_names.get(c, c) for c in columns], filter=expression)
+        return table.to_pandas().rename(columns=PARTITION_COLUMNS)
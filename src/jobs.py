@@ -0,0 +1,210 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import threading
+import time
+import uuid
+
+# Job states, in the order a job goes through them
+QUEUED, SCRAPING, CLEANING, DONE, FAILED = "queued", "scraping", "cleaning", "done", "failed"
+FINISHED_STATES = {DONE, FAILED}
+
+
+class ScrapeJob:
+    """
+    A scrape and clean of one category running on a background worker.
+
+    The worker thread updates the progress counters while the crawl runs and publishes the
+    cleaned data, the path of its saved brand summary and its version together once cleaning
+    is done, so a reader sees either no result or the complete one. Read it through snapshot().
+    """
+
+    def __init__(self, base_url, max_pages, data_dir):
+        self.id = uuid.uuid4().hex
+        self.base_url = base_url
+        self.max_pages = max_pages
+        self.data_dir = data_dir
+        self.status = QUEUED
+        self.pages_done = 0
+        self.total_pages = max_pages
+        self.products = 0
+        self.errors = 0
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def _set_status(self, status):
+        with self._lock:
+            self.status = status
+
+    def _update_progress(self, pages_done, total_pages, products, errors):
+        """Progress callback of the job's scraper."""
+        with self._lock:
+            self.pages_done = pages_done
+            self.total_pages = total_pages
+            self.products = products
+            self.errors = errors
+
+    def _publish(self, result):
+        """Make the finished result visible to readers in one step."""
+        with self._lock:
+            self.result = result
+            self.status = DONE
+            self.finished_at = time.time()
+
+    def release_result(self):
+        """Hand the finished result over to the caller and drop the job's reference to it."""
+        with self._lock:
+            result, self.result = self.result, None
+            return result
+
+    def _fail(self, error):
+        with self._lock:
+            self.error = error
+            self.status = FAILED
+            self.finished_at = time.time()
+
+    @property
+    def finished(self):
+        """Whether the job is done or failed."""
+        return self.status in FINISHED_STATES
+
+    def snapshot(self):
+        """Return a consistent copy of the job's state and progress as a dict."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "base_url": self.base_url,
+                "status": self.status,
+                "pages_done": self.pages_done,
+                "total_pages": self.total_pages,
+                "products": self.products,
+                "errors": self.errors,
+                "error": self.error,
+                "result": self.result,
+            }
+
+    def progress(self):
+        """Return the share of the category's pages finished so far, between 0 and 1."""
+        with self._lock:
+            if self.status == DONE:
+                return 1.0
+            return min(self.pages_done / self.total_pages, 1.0) if self.total_pages else 0.0
+
+    def run(self, **scraper_options):
+        """
+        Scrape the category into the store of the data directory, clean it and publish the result.
+
+        The run stays in the store next to the earlier runs of the category, and its brand summary
+        is saved below the data directory. The published cleaned data lives in memory.
+        """
+        # The scraper and cleaner pull in requests, bs4, pandas and pyarrow, which the
+        # dashboard only needs once data is collected
+        from src import analytics
+        from src.cleaner import DataCleaner
+        from src.dataset_store import category_slug
+        from src.trendyol_scraper import TrendyolScraper
+
+        store_dir = os.path.join(self.data_dir, "store")
+        try:
+            self._set_status(SCRAPING)
+            scraper = TrendyolScraper(base_url=self.base_url, max_pages=self.max_pages, store_dir=store_dir,
+                                      progress_callback=self._update_progress, **scraper_options)
+            report = scraper.run()
+            if scraper.run_id is None:
+                self._fail("No data scraped.")
+                return
+
+            self._set_status(CLEANING)
+            category = category_slug(self.base_url)
+            summary_path = os.path.join(self.data_dir, "summaries", category, f"{scraper.run_id}.parquet")
+            cleaner = DataCleaner(store_dir=store_dir, categories=[category], runs=[scraper.run_id],
+                                  summary_path=summary_path)
+            cleaned_data = cleaner.clean()
+            if cleaned_data is None:
+                self._fail("Data cleaning failed.")
+                return
+
+            self._publish({
+                "cleaned_data": cleaned_data,
+                "summary_path": summary_path,
+                "version": analytics.dataset_version(cleaned_data),
+                "store_dir": store_dir,
+                "category": category,
+                "run_id": scraper.run_id,
+                "report": report.to_dict(),
+                "metrics": scraper.metrics.summary(),
+            })
+            logging.info(f"Job {self.id} finished with {len(cleaned_data)} cleaned rows.")
+        except Exception as e:
+            logging.exception(f"Job {self.id} failed")
+            self._fail(str(e))
+
+
+class JobManager:
+    def __init__(self, max_workers=2, keep_finished=32, data_dir="data", **scraper_options):
+        """
+        Initialize the JobManager
+
+        Jobs run on a small pool of worker threads, so a crawl never blocks the Streamlit
+        script thread of the session that started it and sessions keep being served while
+        crawls run. Crawling is network bound and parsing in lxml releases the GIL.
+
+        Args:
+            max_workers (int): Jobs running at the same time. Further jobs wait in the queue.
+            keep_finished (int): Finished jobs kept for their sessions to pick up their results.
+            data_dir (str): Directory holding the DatasetStore the jobs scrape into and the brand
+                summaries of their datasets.
+            **scraper_options: Extra TrendyolScraper arguments used by every job.
+        """
+        self.keep_finished = keep_finished
+        self.data_dir = data_dir
+        self.scraper_options = scraper_options
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape-job")
+        self._jobs = {}
+        self._category_locks = {}
+        self._lock = threading.Lock()
+
+    def _run(self, job):
+        """Run a job on a worker, after any other job of its category."""
+        # Jobs of a category write to the same store partitions and resume the same checkpoint
+        with self._lock:
+            category_lock = self._category_locks.setdefault(job.base_url.strip().rstrip("/"), threading.Lock())
+        with category_lock:
+            job.run(**self.scraper_options)
+
+    def submit(self, base_url, max_pages):
+        """
+        Queue a scrape and clean of a category and return its ScrapeJob right away.
+
+        Args:
+            base_url (str): Category listing URL to scrape.
+            max_pages (int): Number of listing pages to scrape at most.
+
+        Returns:
+            ScrapeJob: The queued job.
+        """
+        job = ScrapeJob(base_url, max_pages, self.data_dir)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        logging.info(f"Job {job.id} queued for {base_url} ({max_pages} pages).")
+        return job
+
+    def get(self, job_id):
+        """Return the job with the given id, or None if it is unknown or was pruned."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond keep_finished."""
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        for job in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job.id]
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and optionally wait for the running ones."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
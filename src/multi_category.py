@@ -0,0 +1,202 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+import logging
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.crawl_control import AimdController
+from src.trendyol_scraper import REQUEST_HEADERS, TrendyolScraper
+
+
+class MultiCategoryScraper:
+    def __init__(self, base_urls, max_pages=164, max_workers=20, max_connections_per_host=6,
+                 output_file="data/raw_data.csv", store_dir=None, progress_callback=None, **scraper_options):
+        """
+        Initialize the MultiCategoryScraper
+
+        Crawls several categories at once on one shared pool of fetch threads instead of one
+        category after the other. Pages are handed out round-robin across the categories, so
+        a large category does not hold back the small ones, and no host gets more than
+        max_connections_per_host requests at a time. Rows are tagged with their category.
+
+        Args:
+            base_urls (list[str]): Category listing URLs to scrape.
+            max_pages (int | dict[str, int]): Listing pages per category, or a mapping of URL to pages.
+            max_workers (int): Requests in flight across all categories.
+            max_connections_per_host (int): Requests in flight to a single host. With
+                adaptive_concurrency this is the upper bound of each host's AIMD limit.
+            output_file (str): CSV file the rows are appended to when no store_dir is set.
+            store_dir (str | None): Root of a DatasetStore. Every category becomes a partition of one run.
+            progress_callback (callable | None): Called after every finished page with the pages done,
+                expected page count, products found and failed pages summed over all categories.
+            **scraper_options: Further TrendyolScraper options applied to every category, such as
+                parser_backend, cache_dir, adaptive_pagination, adaptive_concurrency or max_retries.
+                Pages are fetched by the shared threads and parsed inline, so async_mode and
+                parse_workers are not supported.
+        """
+        from src.dataset_store import category_slug
+
+        if scraper_options.get("async_mode") or scraper_options.get("parse_workers"):
+            raise ValueError("MultiCategoryScraper fetches on its shared threads and parses inline, "
+                             "async_mode and parse_workers are not supported.")
+
+        self.max_workers = max_workers
+        self.store_dir = store_dir
+        self.progress_callback = progress_callback
+        self.run_id = None
+        self.categories = {url: category_slug(url) for url in base_urls}
+        if len(set(self.categories.values())) < len(base_urls):
+            raise ValueError("Every category URL must be given once and have its own category key.")
+        self.hosts = {url: urlparse(url).netloc for url in base_urls}
+
+        # One limit per host, shared by the categories on it, so throttling by a host slows
+        # down all of its categories while other hosts keep going
+        adaptive = scraper_options.get("adaptive_concurrency", False)
+        self.host_limits = {
+            host: AimdController(max_connections_per_host, max_connections_per_host, adaptive=adaptive)
+            for host in set(self.hosts.values())
+        }
+
+        self.session = requests.Session()
+        self.session.headers.update(REQUEST_HEADERS)
+        adapter = HTTPAdapter(pool_connections=len(self.host_limits), pool_maxsize=max_connections_per_host)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.scrapers = {}
+        for url in base_urls:
+            pages = max_pages.get(url, 164) if isinstance(max_pages, dict) else max_pages
+            # CSV runs share one output file, so each category keeps its own checkpoint next to it
+            checkpoint_file = None if store_dir else f"{output_file}.{self.categories[url]}.checkpoint.json"
+            self.scrapers[url] = TrendyolScraper(
+                base_url=url, max_pages=pages, max_workers=max_connections_per_host, output_file=output_file,
+                store_dir=store_dir, checkpoint_file=checkpoint_file, progress_callback=self._category_progress,
+                session=self.session, **scraper_options
+            )
+
+    def _category_progress(self, *_):
+        """Report the progress summed over all categories."""
+        if self.progress_callback is None:
+            return
+        scrapers = self.scrapers.values()
+        self.progress_callback(
+            sum(scraper.pages_done for scraper in scrapers),
+            sum(scraper.last_page or scraper.max_pages for scraper in scrapers),
+            sum(scraper.products_found for scraper in scrapers),
+            sum(scraper.pages_failed for scraper in scrapers),
+        )
+
+    def iter_pages(self, resume=None):
+        """
+        Fetch and parse the pages of all categories, yielding (url, page, products) batches as
+        soon as each page is parsed. Products carry their category key as 'Category'.
+
+        Args:
+            resume (dict | None): Maps a URL to the (pages, last page) saved by an earlier attempt
+                of its run, which are not fetched again.
+        """
+        resume = resume or {}
+        # Each category runs its pages through its scraper's PageCrawl, limited by its host
+        crawls = {
+            url: scraper.start_crawl(*resume.get(url, ((), None)), concurrency=self.host_limits[self.hosts[url]])
+            for url, scraper in self.scrapers.items()
+        }
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        order = deque(self.scrapers)
+
+        def in_flight(host=None):
+            return sum(len(crawl.pending) for url, crawl in crawls.items() if host in (None, self.hosts[url]))
+
+        def schedule():
+            # Every pass hands out at most one page per category, starting after the category
+            # that got the last one, until the workers are busy or no category may go on
+            scheduled = True
+            while scheduled and in_flight() < self.max_workers:
+                scheduled = False
+                for _ in range(len(order)):
+                    url = order[0]
+                    order.rotate(-1)
+                    host = self.hosts[url]
+                    if in_flight() >= self.max_workers:
+                        break
+                    if in_flight(host) >= int(self.host_limits[host].limit):
+                        continue
+                    page = crawls[url].next_page()
+                    if page is not None:
+                        scraper = self.scrapers[url]
+                        crawls[url].add(pool.submit(scraper.fetch_page, scraper.page_url(page)), page)
+                        scheduled = True
+
+        try:
+            schedule()
+            while in_flight():
+                done, _ = wait(set().union(*(crawl.pending for crawl in crawls.values())),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = next((url for url, crawl in crawls.items() if future in crawl.pending), None)
+                    if url is None:
+                        # Cancelled as beyond the last page while we were waiting
+                        continue
+                    crawl = crawls[url]
+                    page = crawl.pop(future)
+                    try:
+                        page_data = crawl.parse_inline(page, future.result())
+                    except Exception as e:
+                        page_data = crawl.failed(page, e)
+                    if (page_data := crawl.finish(page, page_data)) is not None:
+                        category = self.categories[url]
+                        yield url, page, [{**row, "Category": category} for row in page_data]
+                schedule()
+        finally:
+            pool.shutdown(cancel_futures=True)
+            for scraper in self.scrapers.values():
+                scraper.finish_crawl()
+
+    def scrape(self):
+        """Scrape all categories and return a list of product data tagged with their category."""
+        data = []
+        for _, _, page_data in self.iter_pages():
+            data.extend(page_data)
+        return data
+
+    def run(self):
+        """
+        Scrape all categories, save their rows and return the CrawlReport of every category URL.
+
+        Rows are streamed to the output and checkpointed per category like TrendyolScraper.run,
+        so running again after a crash only fetches the missing pages. In a dataset store all
+        categories are written as partitions of one run, available as run_id.
+        """
+        logging.info(f"Starting Trendyol scraper for {len(self.scrapers)} categories...")
+        run_id = None
+        if self.store_dir:
+            from src.dataset_store import new_run_id
+
+            run_id = new_run_id()
+        started = time.monotonic()
+        opened = {url: scraper.open_run(run_id) for url, scraper in self.scrapers.items()}
+        resume = {url: (checkpoint.pages, checkpoint.last_page) for url, (checkpoint, _) in opened.items()}
+        try:
+            for url, page, page_data in self.iter_pages(resume):
+                checkpoint, sink = opened[url]
+                checkpoint.last_page = self.scrapers[url].last_page
+                sink.add(page, page_data)
+        finally:
+            for _, sink in opened.values():
+                sink.flush()
+                sink.close()
+
+        for url, (checkpoint, _) in opened.items():
+            self.scrapers[url].close_run(checkpoint)
+        run_ids = {scraper.run_id for scraper in self.scrapers.values()} - {None}
+        # A resumed category keeps the run it was started in
+        self.run_id = run_ids.pop() if len(run_ids) == 1 else None
+        logging.info(
+            f"{len(self.scrapers)} categories scraped in {time.monotonic() - started:.1f}s: "
+            f"{sum(s.pages_done for s in self.scrapers.values())} pages, "
+            f"{sum(checkpoint.rows for checkpoint, _ in opened.values())} products saved."
+        )
+        return {url: scraper.report for url, scraper in self.scrapers.items()}
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class PageCache:
+    def __init__(self, cache_dir="data/page_cache", ttl=600, max_bytes=512 * 1024 * 1024):
+        """
+        Initialize the PageCache
+
+        Page bodies are stored content-addressed under 'objects/', keyed by their SHA-256,
+        and an SQLite index maps each URL to its body, validators and fetch time. Parsed
+        rows are stored per body and parser backend so an unchanged page never has to be
+        parsed twice. A body no URL points at anymore is deleted with its parsed rows.
+
+        Args:
+            cache_dir (str): Directory holding the index and the page bodies.
+            ttl (float): Seconds a cached page is served without contacting the server.
+                Older entries are revalidated with If-None-Match/If-Modified-Since.
+            max_bytes (int): Size budget of the stored bodies. Least recently used
+                entries are evicted once it is exceeded.
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), timeout=30, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, body_hash TEXT NOT NULL, size INTEGER NOT NULL, "
+                "etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS parsed_rows ("
+                "body_hash TEXT NOT NULL, parser TEXT NOT NULL, rows TEXT NOT NULL, PRIMARY KEY (body_hash, parser))"
+            )
+
+    @staticmethod
+    def content_key(page_content):
+        """Return the content address of a page body."""
+        return hashlib.sha256(page_content).hexdigest()
+
+    def _object_path(self, body_hash):
+        return os.path.join(self.cache_dir, "objects", body_hash[:2], body_hash)
+
+    def lookup(self, url):
+        """Return the cache entry of a URL as a dict, or None if the page is not cached."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body_hash, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or not os.path.exists(self._object_path(row[0])):
+            return None
+        return {"url": url, "body_hash": row[0], "etag": row[1], "last_modified": row[2], "fetched_at": row[3]}
+
+    def is_fresh(self, entry):
+        """Check whether an entry is young enough to be served without revalidation."""
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Build the revalidation headers of a cache entry."""
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read(self, entry):
+        """Read the body of a cache entry and mark it as recently used."""
+        try:
+            with open(self._object_path(entry["body_hash"]), "rb") as f:
+                page_content = f.read()
+        except OSError:
+            return None
+        with self._lock, self._db:
+            self._db.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), entry["url"]))
+        return page_content
+
+    def revalidated(self, entry):
+        """Record that the server confirmed an entry is unchanged (HTTP 304) and return its body."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), entry["url"]))
+        return self.read(entry)
+
+    def store(self, url, page_content, headers):
+        """Store a freshly downloaded page with the validators from its response headers."""
+        body_hash = self.content_key(page_content)
+        path = self._object_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(page_content)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock, self._db:
+            previous = self._db.execute("SELECT body_hash FROM pages WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body_hash, len(page_content), headers.get("ETag"), headers.get("Last-Modified"), now, now)
+            )
+            # The listing changed, drop its old body unless another URL still has the same content
+            if previous is not None and previous[0] != body_hash:
+                self._drop_unreferenced(previous[0])
+        self._evict()
+
+    def _drop_unreferenced(self, body_hash):
+        """Delete a body and its parsed rows if no URL points at it. Call with the lock held."""
+        if self._db.execute("SELECT 1 FROM pages WHERE body_hash = ?", (body_hash,)).fetchone():
+            return False
+        try:
+            os.remove(self._object_path(body_hash))
+        except OSError:
+            pass
+        self._db.execute("DELETE FROM parsed_rows WHERE body_hash = ?", (body_hash,))
+        return True
+
+    def get_rows(self, body_hash, parser_backend):
+        """Return the rows a parser backend extracted from a page body, or None if it has not parsed it yet."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT rows FROM parsed_rows WHERE body_hash = ? AND parser = ?", (body_hash, parser_backend)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_rows(self, body_hash, parser_backend, rows):
+        """Remember the rows a parser backend extracted from a page body."""
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO parsed_rows VALUES (?, ?, ?)",
+                             (body_hash, parser_backend, json.dumps(rows)))
+
+    def _evict(self):
+        """Drop least recently used entries until the stored bodies fit into max_bytes."""
+        with self._lock, self._db:
+            total = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT body_hash, size FROM pages)"
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            evicted = 0
+            entries = self._db.execute("SELECT url, body_hash, size FROM pages ORDER BY last_access").fetchall()
+            for url, body_hash, size in entries:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+                evicted += 1
+                # Bodies are shared between URLs with identical content
+                if self._drop_unreferenced(body_hash):
+                    total -= size
+        logging.info(f"Page cache evicted {evicted} entries.")
@@ -0,0 +1,186 @@
+from bs4 import BeautifulSoup
+from bs4.dammit import EncodingDetector, UnicodeDammit
+import logging
+import re
+import time
+
+def parse_products_bs4(page_content):
+    """
+    Parse the HTML content of a listing page with BeautifulSoup and extract product data.
+
+    This is the reference backend; other backends must return exactly the same dicts.
+    """
+    soup = BeautifulSoup(page_content, "html.parser")
+    trendyol_data = []
+
+    # Use .select() to find product containers
+    product_containers = soup.select("div.p-card-wrppr")
+    for product in product_containers:
+        try:
+            brand = product.select_one("span.prdct-desc-cntnr-ttl")
+            product_name = product.select_one("span.prdct-desc-cntnr-name.hasRatings")
+            product_desc = product.select_one("div.product-desc-sub-text")
+            rating_score = product.select_one("span.rating-score")
+            ratings = product.select_one("div.ratings")
+            price = product.select_one("div.price-item.discounted")
+
+            brand = brand.text.strip() if brand else None
+            product_name = product_name.text.strip() if product_name else None
+            product_desc = product_desc.text.strip() if product_desc else None
+            rating_score = rating_score.text.strip() if rating_score else None
+            ratings = ratings.text.strip("()") if ratings else None
+            price = price.text.strip() if price else None
+
+            trendyol_data.append({
+                "Product Brand": brand,
+                "Product Name": product_name,
+                "Product Description": product_desc,
+                "Rating Score": rating_score,
+                "Rating Count": ratings,
+                "Price (TL)": price
+            })
+        except Exception as e:
+            logging.warning(f"Failed to parse a product: {e}")
+
+    return trendyol_data
+
+
+# Tag and classes of the product fields inside a "div.p-card-wrppr" card,
+# mirroring the CSS selectors of the reference backend
+FIELD_SELECTORS = {
+    "Product Brand": ("span", "prdct-desc-cntnr-ttl"),
+    "Product Name": ("span", "prdct-desc-cntnr-name", "hasRatings"),
+    "Product Description": ("div", "product-desc-sub-text"),
+    "Rating Score": ("span", "rating-score"),
+    "Rating Count": ("div", "ratings"),
+    "Price (TL)": ("div", "price-item", "discounted"),
+}
+
+
+def _clean_field(field, text):
+    """Strip a field's text the same way the reference backend does."""
+    # The rating count is rendered as "(123)"
+    if field == "Rating Count":
+        return text.strip("()")
+    return text.strip()
+
+
+# BeautifulSoup keeps the contents of these tags out of .text, so their text is not part of a field
+_HIDDEN_TEXT_TAGS = {"script", "style", "template"}
+
+
+def _visible_text(element):
+    """Return an element's text like BeautifulSoup's .text, leaving out scripts, styles, templates and comments."""
+    parts = [element.text or ""]
+    for child in element:
+        # Comments and processing instructions have no string tag, their tail text still counts
+        if isinstance(child.tag, str) and child.tag not in _HIDDEN_TEXT_TAGS:
+            parts.append(_visible_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def _decode(page_content):
+    """Decode raw page bytes the way BeautifulSoup would for well-formed pages."""
+    if isinstance(page_content, str):
+        return page_content
+    encoding = EncodingDetector.find_declared_encoding(page_content, is_html=True) or "utf-8"
+    try:
+        return page_content.decode(encoding)
+    except (LookupError, UnicodeDecodeError):
+        # Fall back to BeautifulSoup's full encoding detection
+        return UnicodeDammit(page_content, is_html=True).unicode_markup
+
+
+def _class_xpath(tag, *classes):
+    """Build an XPath step matching a tag that carries all of the given classes."""
+    tests = "".join(f"[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]" for cls in classes)
+    return f"{tag}{tests}"
+
+
+_lxml_xpaths = None
+
+
+def _compiled_lxml_xpaths():
+    """Compile the lxml XPath expressions once per process."""
+    global _lxml_xpaths
+    if _lxml_xpaths is None:
+        from lxml import etree
+
+        _lxml_xpaths = (
+            etree.XPath("//" + _class_xpath("div", "p-card-wrppr")),
+            {
+                field: etree.XPath(".//" + _class_xpath(*selector))
+                for field, selector in FIELD_SELECTORS.items()
+            },
+        )
+    return _lxml_xpaths
+
+
+def parse_products_lxml(page_content):
+    """Parse the HTML content of a listing page with lxml and extract product data."""
+    import lxml.html
+    from lxml.etree import ParserError
+
+    try:
+        root = lxml.html.document_fromstring(_decode(page_content))
+    except ParserError:
+        # lxml refuses empty documents, BeautifulSoup just finds no products
+        return []
+
+    card_xpath, field_xpaths = _compiled_lxml_xpaths()
+    trendyol_data = []
+    for product in card_xpath(root):
+        try:
+            row = {}
+            for field, xpath in field_xpaths.items():
+                matches = xpath(product)
+                row[field] = _clean_field(field, _visible_text(matches[0])) if matches else None
+            trendyol_data.append(row)
+        except Exception as e:
+            logging.warning(f"Failed to parse a product: {e}")
+
+    return trendyol_data
+
+
+# The listing states its size as '"<query>" araması için 1234 sonuç listeleniyor' and in its
+# embedded state as '"totalCount":1234'. Large categories are only given as a lower bound, "10000+".
+_RESULT_COUNT_PATTERNS = (
+    re.compile(r'"totalCount"\s*:\s*(\d+)'),
+    re.compile(r"(\d[\d.]*)(\+?)\s*sonuç"),
+)
+
+
+def parse_result_count(page_content):
+    """Return the exact number of products a listing page says its category has, or None."""
+    text = _decode(page_content)
+    for pattern in _RESULT_COUNT_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            # A count like "10000+" is only a lower bound and cannot be used to find the end
+            if len(match.groups()) > 1 and match.group(2):
+                return None
+            return int(match.group(1).replace(".", ""))
+    return None
+
+
+PARSER_BACKENDS = {
+    "bs4": parse_products_bs4,
+    "lxml": parse_products_lxml,
+}
+
+
+def parse_products(page_content, backend="bs4"):
+    """
+    Parse the HTML content of a listing page with the given backend.
+
+    Defined at module level so it can be sent to worker processes.
+    """
+    return PARSER_BACKENDS[backend](page_content)
+
+
+def parse_products_timed(page_content, backend="bs4"):
+    """Parse a listing page like parse_products and return (products, seconds spent parsing)."""
+    started = time.perf_counter()
+    products = PARSER_BACKENDS[backend](page_content)
+    return products, time.perf_counter() - started
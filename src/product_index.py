@@ -0,0 +1,261 @@
+from datetime import datetime, timezone
+import logging
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+# A product is identified by these columns, the others are its state at the time of a run
+IDENTITY_COLUMNS = ["Product Brand", "Product Name", "Product Description"]
+STATE_COLUMNS = ["Rating Score", "Rating Count", "Price (TL)"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    run TEXT NOT NULL,
+    category TEXT,
+    recorded_at TEXT NOT NULL,
+    UNIQUE (run, category)
+);
+-- The latest state of every product, its hash decides whether a new row is a change
+CREATE TABLE IF NOT EXISTS products (
+    key INTEGER PRIMARY KEY,
+    brand TEXT,
+    name TEXT,
+    description TEXT,
+    state INTEGER NOT NULL,
+    rating_score REAL,
+    rating_count INTEGER,
+    price TEXT,
+    first_seq INTEGER NOT NULL,
+    changed_seq INTEGER NOT NULL
+);
+-- One row per product and run in which it was new or changed, clustered by product for its history
+CREATE TABLE IF NOT EXISTS changes (
+    key INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    rating_score REAL,
+    rating_count INTEGER,
+    price TEXT,
+    PRIMARY KEY (key, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS changes_by_seq ON changes (seq);
+"""
+
+
+def _identity(df):
+    """Normalize the identity columns so the same product always hashes to the same key."""
+    return df.reindex(columns=IDENTITY_COLUMNS).fillna("").astype(str).apply(lambda column: column.str.strip())
+
+
+def _state(df):
+    """Normalize the state columns, so '4.5' from a CSV and 4.5 from the store compare equal."""
+    state = df.reindex(columns=STATE_COLUMNS)
+    return pd.DataFrame({
+        "Rating Score": pd.to_numeric(state["Rating Score"], errors="coerce"),
+        "Rating Count": pd.to_numeric(state["Rating Count"], errors="coerce"),
+        "Price (TL)": state["Price (TL)"].fillna("").astype(str).str.strip(),
+    }, index=df.index)
+
+
+def _hash(df):
+    # A 64 bit hash of the columns stands in for them in the index, like the cleaner's row keys
+    return pd.util.hash_pandas_object(df, index=False).astype("int64").values
+
+
+def product_key(brand, name, description=None):
+    """Return the index key of a product."""
+    return int(_hash(_identity(pd.DataFrame([[brand, name, description]], columns=IDENTITY_COLUMNS)))[0])
+
+
+def recorded_now():
+    """Return the current UTC time the way runs are timestamped in the index."""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _nullable(value):
+    """Convert a pandas value to what sqlite3 stores, NaN becoming NULL."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ProductIndex:
+    def __init__(self, path="data/product_index.sqlite"):
+        """
+        Initialize the ProductIndex
+
+        Keeps a persistent index of every product seen, keyed by a stable hash of its brand,
+        name and description, holding a hash of its latest rating, rating count and price.
+        A run only records the products that are new or changed, with the run and its time,
+        so the index grows with the rate of change instead of with runs times catalog size,
+        and answers price history and 'what changed since run N' queries from its indexes.
+
+        Args:
+            path (str): SQLite file of the index.
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        with self.db:
+            self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def diff(self, data):
+        """
+        Return the rows of a run that are new or changed compared to the index, without recording them.
+
+        Args:
+            data (list[dict] | pd.DataFrame): Rows with the scraper's columns.
+
+        Returns:
+            pd.DataFrame: The new and changed rows, the last one of a product repeated within
+            data, with their index key, state hash and 'new' or 'changed' in '_key', '_state'
+            and '_change'.
+        """
+        df = pd.DataFrame(data)
+        if df.empty:
+            return df.assign(_key=pd.Series(dtype="int64"), _state=pd.Series(dtype="int64"),
+                             _change=pd.Series(dtype=object))
+        df = df.assign(_key=_hash(_identity(df)), _state=_hash(_state(df)))
+        df = df.drop_duplicates(subset="_key", keep="last")
+
+        # Committed right away, so no read lock is held between diff and commit
+        with self.db:
+            self.db.execute("CREATE TEMP TABLE IF NOT EXISTS incoming (key INTEGER PRIMARY KEY)")
+            self.db.execute("DELETE FROM incoming")
+            self.db.executemany("INSERT INTO incoming VALUES (?)", ((int(key),) for key in df["_key"]))
+            known = dict(self.db.execute("SELECT key, state FROM products WHERE key IN (SELECT key FROM incoming)"))
+            self.db.execute("DELETE FROM incoming")
+
+        # Compared as Python ints, a float column would round the 64 bit hashes
+        previous = [known.get(int(key)) for key in df["_key"]]
+        is_new = np.array([state is None for state in previous])
+        df["_change"] = np.where(is_new, "new", "changed")
+        return df[is_new | np.array([state is not None and state != int(current)
+                                     for state, current in zip(previous, df["_state"])])]
+
+    def _run_seq(self, run, category, recorded_at):
+        """Return the sequence number of a run of a category, registering it on first use."""
+        self.db.execute("INSERT OR IGNORE INTO runs (run, category, recorded_at) VALUES (?, ?, ?)",
+                        (run, category, recorded_at))
+        query = "SELECT seq FROM runs WHERE run = ? AND category IS ?"
+        return self.db.execute(query, (run, category)).fetchone()[0]
+
+    def commit(self, changes, run, category=None, recorded_at=None):
+        """
+        Record the new and changed rows returned by diff as the state of the products in a run.
+
+        The run is registered even when changes is empty, so later runs can be asked for
+        what changed since a run in which nothing did.
+
+        Args:
+            changes (pd.DataFrame): The result of diff.
+            run (str): Identifier of the run, such as a DatasetStore run id.
+            category (str | None): Category key of the rows.
+            recorded_at (str | None): ISO time of the run, now when None.
+        """
+        recorded_at = recorded_at or recorded_now()
+        state = _state(changes)
+        identity = changes.reindex(columns=IDENTITY_COLUMNS)
+        with self.db:
+            seq = self._run_seq(run, category, recorded_at)
+            rows = [
+                tuple(_nullable(value) for value in row)
+                for row in zip(changes["_key"], identity["Product Brand"], identity["Product Name"],
+                               identity["Product Description"], changes["_state"], state["Rating Score"],
+                               state["Rating Count"], state["Price (TL)"], changes["_change"])
+            ]
+            self.db.executemany(
+                """
+                INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET state = excluded.state, rating_score = excluded.rating_score,
+                    rating_count = excluded.rating_count, price = excluded.price, changed_seq = excluded.changed_seq
+                """,
+                (row[:8] + (seq, seq) for row in rows)
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO changes VALUES (?, ?, ?, ?, ?, ?)",
+                ((row[0], seq, row[8], row[5], row[6], row[7]) for row in rows)
+            )
+        logging.info(f"{len(rows)} new or changed products recorded for run {run}.")
+
+    def record(self, data, run, category=None):
+        """Record a run's rows and return the new and changed ones, see diff and commit."""
+        changes = self.diff(data)
+        self.commit(changes, run, category)
+        return changes
+
+    def price_history(self, brand, name, description=None):
+        """
+        Return the recorded states of a product, oldest first.
+
+        Returns:
+            pd.DataFrame: 'Run', 'Category', 'Recorded At', 'Change', 'Price (TL)', 'Rating Score'
+            and 'Rating Count' of every run the product was new or changed in.
+        """
+        return pd.read_sql_query(
+            """
+            SELECT r.run AS "Run", r.category AS "Category", r.recorded_at AS "Recorded At", c.kind AS "Change",
+                   c.price AS "Price (TL)", c.rating_score AS "Rating Score", c.rating_count AS "Rating Count"
+            FROM changes c JOIN runs r ON r.seq = c.seq
+            WHERE c.key = ?
+            ORDER BY c.seq
+            """,
+            self.db, params=(product_key(brand, name, description),)
+        )
+
+    def changes_since(self, run=None):
+        """
+        Return the products that were new or changed in the runs recorded after a run.
+
+        Args:
+            run (str | None): Identifier of the run. None returns every recorded change.
+
+        Returns:
+            pd.DataFrame: The scraper's columns with the 'Run', 'Category', 'Recorded At' and
+            'Change' of every change, oldest first.
+        """
+        after = 0
+        if run is not None:
+            row = self.db.execute("SELECT max(seq) FROM runs WHERE run = ?", (run,)).fetchone()
+            if row[0] is None:
+                raise ValueError(f"Run '{run}' is not in the product index.")
+            after = row[0]
+        return pd.read_sql_query(
+            """
+            SELECT p.brand AS "Product Brand", p.name AS "Product Name", p.description AS "Product Description",
+                   c.rating_score AS "Rating Score", c.rating_count AS "Rating Count", c.price AS "Price (TL)",
+                   r.run AS "Run", r.category AS "Category", r.recorded_at AS "Recorded At", c.kind AS "Change"
+            FROM changes c JOIN runs r ON r.seq = c.seq JOIN products p ON p.key = c.key
+            WHERE c.seq > ?
+            ORDER BY c.seq, p.key
+            """,
+            self.db, params=(after,)
+        )
+
+    def current(self):
+        """Return the latest state of every product, the full catalog that change-only runs no longer repeat."""
+        return pd.read_sql_query(
+            """
+            SELECT brand AS "Product Brand", name AS "Product Name", description AS "Product Description",
+                   rating_score AS "Rating Score", rating_count AS "Rating Count", price AS "Price (TL)"
+            FROM products
+            """,
+            self.db
+        )
+
+    def runs(self):
+        """Return the recorded runs with the number of products that were new or changed in each."""
+        return pd.read_sql_query(
+            """
+            SELECT r.run AS "Run", r.category AS "Category", r.recorded_at AS "Recorded At",
+                   count(c.key) AS "Changed Products"
+            FROM runs r LEFT JOIN changes c ON c.seq = r.seq
+            GROUP BY r.seq ORDER BY r.seq
+            """,
+            self.db
+        )
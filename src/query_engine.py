@@ -0,0 +1,294 @@
+import importlib.util
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from src import analytics
+
+# DuckDB is optional, the pandas engine answers the same queries without it
+DUCKDB_AVAILABLE = importlib.util.find_spec("duckdb") is not None
+QUERY_BACKENDS = {"auto", "duckdb", "pandas"}
+
+# Summary columns of the DuckDB query, in the order of analytics.brand_summary
+BRAND_SUMMARY_SQL = """
+WITH filtered AS (
+    SELECT * FROM products WHERE {where}
+),
+stats AS (
+    SELECT
+        "Product Brand",
+        count(*) AS product_count,
+        avg("Rating Score") AS average_rating,
+        avg("Price (TL)") AS average_price,
+        min("Price (TL)") AS price_min,
+        quantile_cont("Price (TL)", [0.25, 0.5, 0.75]) AS quartiles,
+        max("Price (TL)") AS price_max,
+        -- The first best rated product of the brand, like idxmax
+        arg_max(
+            struct_pack(name := "Product Name", rating := "Rating Score", price := "Price (TL)"),
+            struct_pack(rating := "Rating Score", first := -position)
+        ) AS top
+    FROM filtered
+    GROUP BY "Product Brand"
+),
+fences AS (
+    -- Box plot whiskers reach the most extreme prices within 1.5 IQR of the quartiles
+    SELECT f."Product Brand", min(f."Price (TL)") AS lower_fence, max(f."Price (TL)") AS upper_fence
+    FROM filtered f JOIN stats s USING ("Product Brand")
+    WHERE f."Price (TL)" BETWEEN s.quartiles[1] - 1.5 * (s.quartiles[3] - s.quartiles[1])
+                             AND s.quartiles[3] + 1.5 * (s.quartiles[3] - s.quartiles[1])
+    GROUP BY f."Product Brand"
+)
+SELECT
+    ? AS "Min Rating Count",
+    "Product Brand",
+    product_count AS "Product Count",
+    average_rating AS "Average Rating",
+    average_price AS "Average Price (TL)",
+    price_min AS "Price Min",
+    quartiles[1] AS "Price Q1",
+    quartiles[2] AS "Price Median",
+    quartiles[3] AS "Price Q3",
+    price_max AS "Price Max",
+    lower_fence AS "Price Lower Fence",
+    upper_fence AS "Price Upper Fence",
+    top.name AS "Top Product Name",
+    top.rating AS "Top Product Rating",
+    top.price AS "Top Product Price (TL)"
+FROM stats LEFT JOIN fences USING ("Product Brand")
+ORDER BY "Product Brand"
+"""
+
+# DataCleaner.clean() in SQL over the Parquet files of a DatasetStore: missing ratings become 0,
+# rows missing a critical value are dropped, duplicates keep their latest occurrence and prices are
+# parsed from the Turkish notation. position numbers the rows in the order of the cleaned frame
+CLEANED_STORE_SQL = r"""
+SELECT * EXCLUDE (raw_price) FROM (
+    SELECT
+        "Product Brand",
+        "Product Name",
+        "Product Description",
+        coalesce("Rating Score", 0) AS "Rating Score",
+        coalesce("Rating Count", 0) AS "Rating Count",
+        coalesce(TRY_CAST(replace(regexp_replace("Price (TL)", '\.| .*', '', 'g'), ',', '.') AS DOUBLE), 0)
+            AS "Price (TL)",
+        category AS "Category",
+        run AS "Run",
+        "Price (TL)" AS raw_price,
+        row_number() OVER (ORDER BY filename, file_row_number) AS position
+    FROM read_parquet({files}, hive_partitioning = true, hive_types = {{'category': VARCHAR, 'run': VARCHAR}},
+                      filename = true, file_row_number = true)
+    WHERE "Product Brand" IS NOT NULL AND "Product Name" IS NOT NULL AND "Price (TL)" IS NOT NULL
+)
+QUALIFY row_number() OVER (
+    PARTITION BY "Product Brand", "Product Name", "Product Description", "Rating Score", "Rating Count", raw_price
+    ORDER BY position DESC
+) = 1
+"""
+
+
+class PandasQueryEngine:
+    def __init__(self, df, summary=None):
+        """
+        Initialize the PandasQueryEngine
+
+        Answers the dashboard's filtered queries with pandas. Queries that only set the
+        rating count threshold are served from the precomputed brand summary.
+
+        Args:
+            df (pd.DataFrame): The cleaned data.
+            summary (pd.DataFrame | None): Its brand summary from analytics.brand_summary.
+        """
+        self.df = df
+        self.summary = summary
+
+    def nbytes(self):
+        """Return the memory held by the engine besides the cleaned frame, which it shares."""
+        return 0 if self.summary is None else int(self.summary.memory_usage(deep=True).sum())
+
+    def _of_runs(self, runs):
+        """Return the rows of the given runs, or all rows when runs is None."""
+        if not runs or "Run" not in self.df.columns:
+            return self.df
+        return self.df[self.df["Run"].isin(runs)]
+
+    def runs(self):
+        """Return the scrape runs that can be filtered on, oldest first."""
+        if "Run" not in self.df.columns:
+            return []
+        return sorted(map(str, self.df["Run"].dropna().unique()))
+
+    def price_bounds(self, runs=None):
+        """Return the lowest and highest price of the data, optionally of the given runs."""
+        prices = self._of_runs(runs)["Price (TL)"]
+        return float(prices.min()), float(prices.max())
+
+    def brands(self, runs=None):
+        """Return the brands of the data, optionally of the given runs, sorted."""
+        return sorted(map(str, self._of_runs(runs)["Product Brand"].dropna().unique()))
+
+    def brand_summary(self, filters):
+        """Return the brand summary rows of the products matching the filters."""
+        if filters.rating_only:
+            return analytics.summary_at(self.summary, self.df, filters.min_rating_count)
+        return analytics.filtered_brand_summary(self.df, filters)
+
+    def rows(self, filters, columns):
+        """Return the given columns of the products matching the filters."""
+        return analytics.apply_filters(self.df, filters)[columns]
+
+    def correlation(self, filters):
+        """Return the correlation matrix of price, rating and rating count of the matching products."""
+        return analytics.correlation(analytics.apply_filters(self.df, filters))
+
+
+class DuckDBQueryEngine:
+    def __init__(self, store_dir, category, runs, summary=None):
+        """
+        Initialize the DuckDBQueryEngine
+
+        Answers filtered queries with vectorized SQL over the Parquet files of a DatasetStore.
+        Every query reads only the partitions of the selected runs, cleans their rows the way
+        DataCleaner.clean() does and filters and aggregates them in one pass on all cores, so
+        only the aggregated rows come back to pandas and no copy of the data is kept in memory.
+        Each query runs on its own cursor, so sessions can share one engine.
+
+        Args:
+            store_dir (str): Root of the DatasetStore.
+            category (str): Category key of the data.
+            runs (tuple[str]): Runs queried when the filters select none, those of the collected dataset.
+            summary (pd.DataFrame | None): Brand summary of these runs from analytics.brand_summary.
+        """
+        import duckdb
+
+        self.store_dir = store_dir
+        self.category = category
+        self.default_runs = tuple(runs)
+        self.summary = summary
+        self._connection = duckdb.connect()
+        self._lock = threading.Lock()
+
+    def nbytes(self):
+        """Return the memory held by the engine. The data stays in the store, only the summary is kept."""
+        return 0 if self.summary is None else int(self.summary.memory_usage(deep=True).sum())
+
+    def _cursor(self, runs):
+        """Return a new cursor whose 'products' view holds the cleaned rows of the runs."""
+        paths = [os.path.join(self.store_dir, f"category={self.category}", f"run={run}", "*.parquet")
+                 for run in runs or self.default_runs]
+        files = "[" + ", ".join("'" + path.replace("'", "''") + "'" for path in paths) + "]"
+        with self._lock:
+            cursor = self._connection.cursor()
+        cursor.execute(f"CREATE TEMP VIEW products AS {CLEANED_STORE_SQL.format(files=files)}")
+        return cursor
+
+    def runs(self):
+        """Return the stored scrape runs of the category, oldest first."""
+        from src.dataset_store import DatasetStore
+
+        return DatasetStore(self.store_dir).runs(self.category)
+
+    def price_bounds(self, runs=None):
+        """Return the lowest and highest price of the data, optionally of the given runs."""
+        query = 'SELECT min("Price (TL)"), max("Price (TL)") FROM products'
+        lowest, highest = self._cursor(runs).execute(query).fetchone()
+        return float(lowest), float(highest)
+
+    def brands(self, runs=None):
+        """Return the brands of the data, optionally of the given runs, sorted."""
+        rows = self._cursor(runs).execute('SELECT DISTINCT "Product Brand" FROM products').fetchall()
+        return sorted(brand for (brand,) in rows)
+
+    def _where(self, filters):
+        """Build the WHERE clause and its parameters of the filters, apart from the runs."""
+        clauses, params = ['"Rating Count" >= ?'], [filters.min_rating_count]
+        if filters.price_range is not None:
+            clauses.append('"Price (TL)" BETWEEN ? AND ?')
+            params.extend(filters.price_range)
+        if filters.brands:
+            clauses.append('list_contains(?, "Product Brand")')
+            params.append(list(filters.brands))
+        return " AND ".join(clauses), params
+
+    def brand_summary(self, filters):
+        """Return the brand summary rows of the products matching the filters."""
+        if filters.rating_only and self.summary is not None and \
+                filters.min_rating_count in set(self.summary["Min Rating Count"]):
+            return self.summary[self.summary["Min Rating Count"] == filters.min_rating_count]
+        where, params = self._where(filters)
+        summary = self._cursor(filters.runs).execute(BRAND_SUMMARY_SQL.format(where=where),
+                                                     params + [filters.min_rating_count]).df()
+        return summary.astype({"Product Count": "int64"})
+
+    def rows(self, filters, columns):
+        """Return the given columns of the products matching the filters."""
+        where, params = self._where(filters)
+        selected = ", ".join(f'"{column}"' for column in columns)
+        return self._cursor(filters.runs).execute(f"SELECT {selected} FROM products WHERE {where} ORDER BY position",
+                                                  params).df()
+
+    def correlation(self, filters):
+        """Return the correlation matrix of price, rating and rating count of the matching products."""
+        columns = ["Price (TL)", "Rating Score", "Rating Count"]
+        where, params = self._where(filters)
+        pairs = [(a, b) for a in columns for b in columns]
+        selected = ", ".join(f'corr("{a}", "{b}")' for a, b in pairs)
+        values = self._cursor(filters.runs).execute(f"SELECT {selected} FROM products WHERE {where}",
+                                                    params).fetchone()
+        matrix = np.array([np.nan if value is None else value for value in values], dtype=float)
+        return pd.DataFrame(matrix.reshape(len(columns), len(columns)), index=columns, columns=columns)
+
+
+def csv_brand_summary(path, thresholds=analytics.RATING_COUNT_THRESHOLDS):
+    """
+    Compute analytics.brand_summary of a cleaned CSV file in DuckDB.
+
+    The file is loaded into a DuckDB table instead of a DataFrame. DuckDB keeps it compressed
+    and spills it to disk past its memory limit, so histories larger than memory can be summarized.
+
+    Args:
+        path (str): Cleaned CSV file, as written by DataCleaner.clean_incremental.
+        thresholds (tuple[int]): Rating count thresholds to summarize at.
+
+    Returns:
+        pd.DataFrame: The brand summary, like analytics.brand_summary returns it.
+    """
+    import duckdb
+
+    connection = duckdb.connect()
+    try:
+        # The row number breaks rating ties like idxmax on the file's row order
+        connection.execute("CREATE TABLE products AS SELECT *, row_number() OVER () AS position "
+                           "FROM read_csv(?, header = true)", [path])
+        sql = BRAND_SUMMARY_SQL.format(where='"Rating Count" >= ?')
+        summaries = [connection.execute(sql, [threshold, threshold]).df() for threshold in thresholds]
+    finally:
+        connection.close()
+    summary = pd.concat(summaries, ignore_index=True)
+    return summary.astype({"Min Rating Count": "int64", "Product Count": "int64"})
+
+
+def make_query_engine(df, summary=None, backend="auto", store_dir=None, category=None, runs=None):
+    """
+    Create the query engine of a cleaned dataset.
+
+    Args:
+        df (pd.DataFrame): The cleaned data.
+        summary (pd.DataFrame | None): Its brand summary from analytics.brand_summary.
+        backend (str): One of QUERY_BACKENDS. 'auto' uses DuckDB when it is installed and the
+            dataset's store is given.
+        store_dir (str | None): Root of the DatasetStore the data was cleaned from, which DuckDB queries.
+        category (str | None): Category key of the data in the store.
+        runs (tuple[str] | None): Runs of the store the data was cleaned from.
+
+    Returns:
+        PandasQueryEngine | DuckDBQueryEngine: The engine.
+    """
+    if backend not in QUERY_BACKENDS:
+        raise ValueError(f"Unknown query backend '{backend}'. Choose one of {sorted(QUERY_BACKENDS)}.")
+    if backend == "duckdb" and store_dir is None:
+        raise ValueError("The DuckDB query backend needs the store_dir the data was cleaned from.")
+    if backend == "duckdb" or (backend == "auto" and DUCKDB_AVAILABLE and store_dir is not None):
+        return DuckDBQueryEngine(store_dir, category, runs, summary)
+    return PandasQueryEngine(df, summary)
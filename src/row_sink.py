@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import pandas as pd
+
+
+class Checkpoint:
+    def __init__(self, path, base_url, run_id=None):
+        """
+        Initialize the Checkpoint
+
+        Records which listing pages of a scrape run are safely written to the output, so a
+        crashed or partly failed run can be restarted and only fetch the missing pages. It also
+        counts the runs that resumed it, so a page that keeps failing cannot hold on to it forever.
+
+        Args:
+            path (str): JSON file the checkpoint is kept in.
+            base_url (str): Category listing URL of the run.
+            run_id (str | None): Dataset store run the rows are written to, None for CSV output.
+        """
+        self.path = path
+        self.base_url = base_url
+        self.run_id = run_id
+        self.pages = set()
+        self.rows = 0
+        self.last_page = None
+        self.resumes = 0
+
+    @classmethod
+    def load(cls, path, base_url):
+        """Return the checkpoint of an unfinished run of the category, or None if there is none."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+        if state.get("base_url") != base_url:
+            return None
+        checkpoint = cls(path, base_url, state.get("run_id"))
+        checkpoint.pages = set(state.get("pages", []))
+        checkpoint.rows = state.get("rows", 0)
+        checkpoint.last_page = state.get("last_page")
+        checkpoint.resumes = state.get("resumes", 0)
+        return checkpoint
+
+    def pages_written(self, pages, rows):
+        """Add pages whose rows were just written to the output and save the checkpoint."""
+        self.pages.update(pages)
+        self.rows += rows
+        self.save()
+
+    def save(self):
+        """Write the checkpoint atomically, so a crash never leaves it half-written."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            "base_url": self.base_url,
+            "run_id": self.run_id,
+            "last_page": self.last_page,
+            "resumes": self.resumes,
+            "rows": self.rows,
+            "pages": sorted(self.pages),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        """Delete the checkpoint once every page of the run is written."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RowSink:
+    """
+    Buffer the rows of finished pages and write them to the output in bounded batches.
+
+    Pages are added to the checkpoint only after their rows were written, so a resumed run
+    neither loses nor duplicates rows. With a ProductIndex only products that are new or
+    changed since an earlier run are written, and recorded in the index after the write.
+    """
+
+    def __init__(self, flush_rows=5000, checkpoint=None, index=None, run_id=None, category=None):
+        self.flush_rows = flush_rows
+        self.checkpoint = checkpoint
+        self.index = index
+        self.run_id = run_id
+        self.category = category
+        self.rows_written = 0
+        self.recorded_at = None
+        self._rows = []
+        self._pages = []
+
+    def add(self, page, rows):
+        """Buffer the rows of a finished page, writing the buffer out once it holds flush_rows rows."""
+        self._rows.extend(rows)
+        self._pages.append(page)
+        if len(self._rows) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows and record their pages in the checkpoint."""
+        rows = self._rows
+        if rows and self.index is not None:
+            from src.product_index import recorded_now
+
+            # One time for the whole run, the one it is registered with in the index
+            self.recorded_at = self.recorded_at or recorded_now()
+            changes = self.index.diff(rows)
+            rows = self._changed_rows(changes.drop(columns=["_key", "_state", "_change"]), self.recorded_at)
+        if len(rows):
+            self._write(rows)
+            self.rows_written += len(rows)
+        if self._rows and self.index is not None:
+            # Also a batch without changes registers the run, for changes_since(run)
+            self.index.commit(changes, self.run_id, self.category, self.recorded_at)
+        if self.checkpoint is not None and self._pages:
+            self.checkpoint.pages_written(self._pages, len(rows))
+        self._rows = []
+        self._pages = []
+
+    def close(self):
+        """Close the product index."""
+        if self.index is not None:
+            self.index.close()
+
+    def _changed_rows(self, rows, recorded_at):
+        """Return the new and changed rows of a batch as they are written."""
+        return rows
+
+    def _write(self, rows):
+        raise NotImplementedError
+
+
+class CsvSink(RowSink):
+    def __init__(self, output_file, flush_rows=5000, checkpoint=None, index=None, run_id=None, category=None):
+        """
+        Initialize the CsvSink
+
+        Args:
+            output_file (str): CSV file the rows are appended to. Columns the file does not have yet,
+                such as 'Category' or 'Run', are added to its header.
+            flush_rows (int): Rows buffered in memory before they are written.
+            checkpoint (Checkpoint | None): Checkpoint updated after every write.
+            index (ProductIndex | None): Index limiting the written rows to new and changed products,
+                which are then saved with their 'Run' and 'Recorded At'.
+            run_id (str | None): Run the rows are recorded under in the index.
+            category (str | None): Category key the rows are recorded under in the index.
+        """
+        super().__init__(flush_rows, checkpoint, index, run_id, category)
+        self.output_file = output_file
+
+    def _changed_rows(self, rows, recorded_at):
+        # Change-only rows of many runs end up in one file, so each is tagged with its run
+        return rows.assign(**{"Run": self.run_id, "Recorded At": recorded_at})
+
+    def _write(self, rows):
+        df = pd.DataFrame(rows)
+        exists = os.path.exists(self.output_file)
+        if exists:
+            # Appended rows must line up with the columns of the file, which gains any new ones
+            header = pd.read_csv(self.output_file, nrows=0).columns.tolist()
+            added = [column for column in df.columns if column not in header]
+            if added:
+                header += added
+                self._rewrite_header(header)
+            df = df.reindex(columns=header)
+        df.to_csv(self.output_file, mode='a' if exists else 'w', header=not exists, index=False, encoding='utf-8')
+        logging.info(f"{len(df)} rows appended to {self.output_file}")
+
+
+    def _rewrite_header(self, columns, chunksize=100_000):
+        """Rewrite the CSV with more columns, left empty in the rows already in it."""
+        tmp_path = f"{self.output_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            pd.DataFrame(columns=columns).to_csv(f, index=False)
+            # Read as text so the rows are written back exactly as they were
+            for chunk in pd.read_csv(self.output_file, dtype=str, keep_default_na=False, chunksize=chunksize):
+                chunk.reindex(columns=columns).to_csv(f, header=False, index=False)
+        os.replace(tmp_path, self.output_file)
+        logging.info(f"{self.output_file} now has the columns {columns}.")
+
+
+class StoreSink(RowSink):
+    def __init__(self, store_dir, category, run_id, flush_rows=5000, checkpoint=None, index=None):
+        """
+        Initialize the StoreSink
+
+        Every batch becomes one more Parquet file of the run's partition in the dataset store.
+
+        Args:
+            store_dir (str): Root of the DatasetStore.
+            category (str): Category key of the rows.
+            run_id (str): Run the rows belong to.
+            flush_rows (int): Rows buffered in memory before they are written.
+            checkpoint (Checkpoint | None): Checkpoint updated after every write.
+            index (ProductIndex | None): Index limiting the written rows to new and changed products.
+        """
+        from src.dataset_store import DatasetStore
+
+        super().__init__(flush_rows, checkpoint, index, run_id, category)
+        self.store = DatasetStore(store_dir)
+
+    def _write(self, rows):
+        self.store.write_run(rows, self.category, self.run_id)
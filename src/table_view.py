@@ -0,0 +1,114 @@
+from collections import OrderedDict
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Columns the text search looks into
+SEARCH_COLUMNS = ["Product Brand", "Product Name", "Product Description"]
+
+
+class TableView:
+    def __init__(self, df, max_cached_queries=32):
+        """
+        Initialize the TableView
+
+        Serves a large DataFrame one page at a time. The lowercased search text, the brand
+        codes and the sort order of every column are built once, so filtering, sorting and
+        paging only index into them and never copy the whole frame.
+
+        Args:
+            df (pd.DataFrame): The rows to browse.
+            max_cached_queries (int): Filter and sort results kept for paging through them.
+        """
+        self.df = df
+        self.max_cached_queries = max_cached_queries
+        columns = [pa.array(df[column], from_pandas=True).cast(pa.large_string()) for column in SEARCH_COLUMNS]
+        separator = pa.scalar(" ", pa.large_string())
+        text = pc.binary_join_element_wise(*columns, separator, null_handling="replace", null_replacement="")
+        self._search_text = pc.utf8_lower(text)
+        brands = df["Product Brand"].astype("category")
+        self._brand_codes = brands.cat.codes.to_numpy()
+        self._brand_categories = brands.cat.categories
+        self._sort_orders = {}
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    def nbytes(self):
+        """Return the memory held by the search index, sort orders and cached queries, without the frame."""
+        with self._lock:
+            arrays = {id(array): array for array in
+                      [self._brand_codes, *self._sort_orders.values(), *self._queries.values()]}
+            return self._search_text.nbytes + sum(array.nbytes for array in arrays.values())
+
+    @property
+    def brands(self):
+        """Return the brands of the rows, sorted."""
+        return sorted(map(str, self._brand_categories))
+
+    def _sort_order(self, column):
+        """Return the row positions ordered by a column, computed on first use."""
+        if column not in self._sort_orders:
+            values = self.df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Order the rows by the rank of their category, missing values last
+                codes = values.cat.codes.to_numpy()
+                ranks = np.argsort(np.argsort(values.cat.categories.astype(str)))
+                values = np.where(codes >= 0, ranks[codes], len(ranks))
+            # Arrow sorts strings with missing values too, and its sort is stable
+            order = pc.sort_indices(pa.array(values, from_pandas=True))
+            self._sort_orders[column] = order.to_numpy()
+        return self._sort_orders[column]
+
+    def _mask(self, search, brands):
+        """Return the boolean mask of rows matching the text search and the brand filter, or None."""
+        mask = None
+        if search:
+            matches = pc.match_substring(self._search_text, search.lower())
+            mask = matches.to_numpy(zero_copy_only=False)
+        if brands:
+            codes = [self._brand_categories.get_loc(brand) for brand in brands if brand in self._brand_categories]
+            brand_mask = np.isin(self._brand_codes, codes)
+            mask = brand_mask if mask is None else mask & brand_mask
+        return mask
+
+    def query(self, search="", brands=(), sort_by=None, ascending=True):
+        """
+        Return the positions of the matching rows in display order.
+
+        Args:
+            search (str): Case-insensitive text the brand, name or description must contain.
+            brands (tuple[str]): Brands to keep. Empty keeps all.
+            sort_by (str | None): Column to sort by. None keeps the original order.
+            ascending (bool): Sort direction.
+
+        Returns:
+            np.ndarray: Row positions into the frame.
+        """
+        key = (search.strip(), tuple(sorted(brands)), sort_by, ascending)
+        with self._lock:
+            if key in self._queries:
+                self._queries.move_to_end(key)
+                return self._queries[key]
+
+            mask = self._mask(key[0], key[1])
+            if sort_by is None:
+                positions = np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+            else:
+                order = self._sort_order(sort_by)
+                positions = order if mask is None else order[mask[order]]
+            if not ascending:
+                positions = positions[::-1]
+
+            self._queries[key] = positions
+            if len(self._queries) > self.max_cached_queries:
+                self._queries.popitem(last=False)
+            return positions
+
+    def page(self, positions, offset, page_size):
+        """Return the rows of one page of a query result."""
+        return self.df.iloc[positions[offset:offset + page_size]]
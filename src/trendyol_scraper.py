@@ -1,9 +1,17 @@
 import requests
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 import pandas as pd
+import asyncio
+import importlib.util
 import logging
 import os
+import time
+
+from src.crawl_control import AimdController, CrawlReport, RETRYABLE_STATUSES, RetryPolicy, parse_retry_after
+from src.crawl_metrics import CrawlMetrics, HttpxTrace
+from src.page_cache import PageCache
+from src.parsers import PARSER_BACKENDS, parse_products, parse_products_timed, parse_result_count
 
 # Configure logging
 logging.basicConfig(
@@ -11,83 +19,615 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+REQUEST_HEADERS = {"User-Agent": "Mozilla/5.0"}
+REQUEST_TIMEOUT = 10
+
+class PagePlan:
+    """
+    Hand out listing page numbers and track where the category really ends.
+
+    Without adaptive pagination every page up to max_pages is handed out. With it, page 1 is
+    fetched alone first and the last page is estimated from its result count, and any page
+    that comes back without products moves the last page in front of it.
+
+    A resumed run skips the pages it already saved and starts from the last page it had found.
+    """
+
+    def __init__(self, max_pages, adaptive=False, skip_pages=(), last_page=None):
+        self.adaptive = adaptive
+        # Only adaptive pagination finds a last page before max_pages
+        self.last_page = min(max_pages, last_page) if adaptive and last_page else max_pages
+        self.skip_pages = set(skip_pages)
+        self.next_page = 1
+        self.result_count = None
+        self._first_page_pending = adaptive and 1 not in self.skip_pages
+
+    def resumed_pages(self):
+        """Return how many pages within the category were saved by an earlier attempt of the run."""
+        return sum(1 for page in self.skip_pages if page <= self.last_page)
+
+    def take(self):
+        """Return the next page number to fetch, or None if nothing may be scheduled right now."""
+        while self.next_page in self.skip_pages:
+            self.next_page += 1
+        if self.next_page > self.last_page or (self._first_page_pending and self.next_page > 1):
+            return None
+        page = self.next_page
+        self.next_page += 1
+        return page
+
+    def beyond_end(self, page):
+        """Check whether a page lies past the last page of the category."""
+        return page > self.last_page
+
+    def page_fetched(self, page, page_content):
+        """Read the category's result count from the first page."""
+        if self.adaptive and page == 1:
+            self.result_count = parse_result_count(page_content)
+
+    def page_done(self, page, product_count):
+        """
+        Record a finished page and return True if the last page moved forward.
+
+        product_count is None for pages that could not be fetched or parsed.
+        """
+        if not self.adaptive:
+            return False
+
+        last_page = self.last_page
+        if page == 1:
+            self._first_page_pending = False
+            if self.result_count is not None and product_count:
+                self.last_page = min(self.last_page, -(-self.result_count // product_count))
+                logging.info(f"{self.result_count} products listed, last page is {self.last_page}.")
+        if product_count == 0:
+            self.last_page = min(self.last_page, page - 1)
+        return self.last_page < last_page
+
+
+class PageCrawl:
+    """
+    The pages of one scrape run of a category, shared by the sync, async and multi-category engines.
+
+    An engine only decides how pages are fetched and parsed concurrently. It takes pages from
+    next_page(), tracks the futures or tasks working on them with add() and pop(), turns fetched
+    bodies into rows with parse_inline(), or with cached_rows() and parsed() when it parses
+    elsewhere, and hands every page to finish(). Pagination, reuse of parsed rows, metrics,
+    progress and the cancellation of pages past the category's end all happen here.
+    """
+
+    def __init__(self, scraper, skip_pages=(), last_page=None):
+        self.scraper = scraper
+        self.plan = PagePlan(scraper.max_pages, scraper.adaptive_pagination, skip_pages, last_page)
+        self.pending = {}
+        scraper.pages_done = self.plan.resumed_pages()
+
+    def window(self):
+        """Return how many pages may be in flight at once."""
+        # Adaptive pagination keeps a small window in flight so little is wasted past the end
+        if self.scraper.adaptive_pagination:
+            return int(self.scraper.concurrency.limit) * 2
+        return self.scraper.max_pages
+
+    def next_page(self):
+        """Return the next page to fetch, or None while the window is full or no page may be scheduled."""
+        if len(self.pending) >= self.window():
+            return None
+        return self.plan.take()
+
+    def add(self, handle, page):
+        """Track a future or task working on a page."""
+        self.pending[handle] = page
+
+    def pop(self, handle):
+        """Stop tracking a completed future or task and return its page, or None if it was cancelled."""
+        return self.pending.pop(handle, None)
+
+    def cached_rows(self, page, page_content):
+        """
+        Take a fetched page and return (body_hash, rows).
+
+        rows were parsed from the same body before and come from the page cache, or are None
+        when the page still has to be parsed. Freshly parsed rows then go through parsed().
+        """
+        self.plan.page_fetched(page, page_content)
+        page_cache = self.scraper.page_cache
+        if page_cache is None:
+            return None, None
+        body_hash = page_cache.content_key(page_content)
+        rows = page_cache.get_rows(body_hash, self.scraper.parser_backend)
+        if rows is not None:
+            rows = self.parsed(page, None, rows, None)
+        return body_hash, rows
+
+    def parsed(self, page, body_hash, rows, seconds):
+        """Record the parse time of a page, None for reused rows, and keep fresh rows in the page cache."""
+        self.scraper.metrics.parsed(self.scraper.page_url(page), seconds, len(rows))
+        if body_hash is not None:
+            self.scraper.page_cache.put_rows(body_hash, self.scraper.parser_backend, rows)
+        return rows
+
+    def parse_inline(self, page, page_content):
+        """Return the rows of a fetched page, parsed on the calling thread, or None if it has no content."""
+        if not page_content:
+            logging.warning(f"No content for page {page} of {self.scraper.base_url}.")
+            return None
+        body_hash, rows = self.cached_rows(page, page_content)
+        if rows is None:
+            rows = self.parsed(page, body_hash, *parse_products_timed(page_content, self.scraper.parser_backend))
+        return rows
+
+    def failed(self, page, error):
+        """Log a page that could not be processed and return None as its rows."""
+        logging.error(f"Error processing page {page} of {self.scraper.base_url}: {error}")
+        return None
+
+    def finish(self, page, rows):
+        """
+        Count a finished page and report the run's progress.
+
+        Args:
+            page (int): The page number.
+            rows (list[dict] | None): Its products, None if it could not be fetched or parsed.
+
+        Returns:
+            list[dict] | None: The rows to hand out, None if there are none or the page lies
+            past the category's end.
+        """
+        scraper, plan = self.scraper, self.plan
+        if plan.page_done(page, None if rows is None else len(rows)):
+            self._cancel_beyond_end()
+        scraper.last_page = plan.last_page
+        if plan.beyond_end(page):
+            return None
+        scraper.pages_done += 1
+        if rows is None and scraper.page_url(page) in scraper._gone_urls:
+            scraper.pages_gone += 1
+        elif rows is None:
+            scraper.pages_failed += 1
+        else:
+            scraper.products_found += len(rows)
+        if scraper.progress_callback is not None:
+            scraper.progress_callback(scraper.pages_done, plan.last_page, scraper.products_found,
+                                      scraper.pages_failed)
+        if rows is not None:
+            logging.info(f"Page {page} scraped successfully. {len(rows)} products found.")
+        return rows
+
+    def _cancel_beyond_end(self):
+        """Cancel the pending futures or tasks of pages past the last page and stop tracking them."""
+        beyond = [handle for handle, page in self.pending.items() if self.plan.beyond_end(page)]
+        for handle in beyond:
+            handle.cancel()
+            del self.pending[handle]
+        if beyond:
+            logging.info(f"Last page of {self.scraper.base_url} is {self.plan.last_page}. "
+                         f"Cancelled {len(beyond)} pending pages beyond it.")
+
+
 class TrendyolScraper:
     def __init__(self, base_url="https://www.trendyol.com/cep-telefonu-x-c103498", 
-                 max_pages=164, max_workers=5, output_file="data/raw_data.csv"):
+                 max_pages=164, max_workers=5, output_file="data/raw_data.csv",
+                 async_mode=False, max_connections_per_host=20, http2=True, parse_workers=0,
+                 parser_backend="bs4", cache_dir=None, cache_ttl=600, cache_max_bytes=512 * 1024 * 1024,
+                 adaptive_pagination=False, adaptive_concurrency=False, max_concurrency=32, max_retries=3,
+                 store_dir=None, progress_callback=None, metrics_path=None, checkpoint_file=None,
+                 flush_rows=5000, index_path=None, max_resumes=3, session=None):
+        """
+        Initialize the TrendyolScraper
+
+        Args:
+            base_url (str): Category listing URL to scrape.
+            max_pages (int): Number of listing pages to scrape.
+            max_workers (int): Number of threads used by the synchronous fetch path.
+            output_file (str): CSV file the scraped rows are appended to when no store_dir is set.
+            async_mode (bool): Fetch pages with a single pooled asyncio HTTP client instead of threads.
+            max_connections_per_host (int): Connection limit of the pooled client in async mode.
+            http2 (bool): Negotiate HTTP/2 in async mode when the 'h2' package is installed.
+            parse_workers (int | None): Processes used to parse pages while fetching continues.
+                0 parses inline on the calling thread, None uses one process per CPU core.
+            parser_backend (str): HTML parser used to extract products, one of PARSER_BACKENDS.
+                'bs4' is the reference implementation, 'lxml' is the fast one.
+            cache_dir (str | None): Directory of an on-disk page cache. None disables caching.
+            cache_ttl (float): Seconds a cached page is reused before it is revalidated.
+            cache_max_bytes (int): Size budget of the page cache before LRU eviction.
+            adaptive_pagination (bool): Stop at the category's real last page, found from the first
+                page's result count or from the first page without products, instead of always
+                fetching max_pages pages.
+            adaptive_concurrency (bool): Adjust the number of in-flight requests to the observed
+                latency and 429/5xx rate (AIMD) instead of keeping it fixed.
+            max_concurrency (int): Upper bound of in-flight requests when adaptive_concurrency is on.
+            max_retries (int): Retries, with jittered exponential backoff, before a page is reported
+                as failed. A Retry-After pauses all requests to the host for that long. A page
+                answered with a non-retryable 4xx status, like 404, is not retried and counts as
+                finished rather than failed.
+            store_dir (str | None): Root of a DatasetStore. When set, each run is written as a
+                typed Parquet partition keyed by category and run instead of appended to output_file.
+            progress_callback (callable | None): Called after every finished page with the run's
+                pages done, expected page count, products found and failed pages so far.
+            metrics_path (str | None): File the run's per-page timings are aggregated into when it
+                finishes, in Prometheus text format for a '.prom' file and as JSON otherwise.
+            checkpoint_file (str | None): JSON file recording the pages run() has saved, so a crashed
+                or partly failed run resumes with the missing pages. Defaults to a file next to
+                output_file, or below store_dir.
+            flush_rows (int): Rows run() buffers in memory before writing them to the output.
+            index_path (str | None): SQLite file of a ProductIndex. When set, run() only writes
+                products that are new or changed since an earlier run and records them in the index.
+            max_resumes (int): Times run() resumes the checkpoint of a partly failed run. After
+                that the missing pages are given up and the next run() starts a new run.
+            session (requests.Session | None): Session of the sync fetch path, to share one
+                connection pool with other scrapers. A new one is created when None.
+        """
+        if parser_backend not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend '{parser_backend}'. Choose one of {sorted(PARSER_BACKENDS)}.")
+
         self.base_url = base_url
         self.max_pages = max_pages
         self.max_workers = max_workers
         self.output_file = output_file
+        self.async_mode = async_mode
+        self.max_connections_per_host = max_connections_per_host
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.parse_workers = parse_workers
+        self.parser_backend = parser_backend
+        self.page_cache = PageCache(cache_dir, cache_ttl, cache_max_bytes) if cache_dir else None
+        self.adaptive_pagination = adaptive_pagination
+        self.adaptive_concurrency = adaptive_concurrency
+        self.max_concurrency = max_concurrency
+        self.retry_policy = RetryPolicy(max_retries)
+        self.store_dir = store_dir
+        self.progress_callback = progress_callback
+        self.metrics_path = metrics_path
+        self.checkpoint_file = checkpoint_file
+        self.flush_rows = flush_rows
+        self.index_path = index_path
+        self.max_resumes = max_resumes
+        self.run_id = None
+        self._start_run()
+
+        # Share one keep-alive session between the worker threads of the sync path
+        self.session = session
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers.update(REQUEST_HEADERS)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency.max_limit)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+
+    def page_url(self, page):
+        """Build the listing URL of the given page number."""
+        return f"{self.base_url}?pi={page}" if page > 1 else self.base_url
+
+    def _fresh_cached_page(self, url):
+        """Look up a URL in the page cache and return (entry, page_content if still fresh)."""
+        if self.page_cache is None:
+            return None, None
+        entry = self.page_cache.lookup(url)
+        if entry is not None and self.page_cache.is_fresh(entry):
+            return entry, self.page_cache.read(entry)
+        return entry, None
+
+    def _start_run(self, concurrency=None):
+        """Reset the concurrency controller, the report and the metrics for a new scrape run."""
+        if concurrency is None:
+            initial = self.max_connections_per_host if self.async_mode else self.max_workers
+            max_limit = self.max_concurrency if self.adaptive_concurrency else initial
+            concurrency = AimdController(initial, max_limit, adaptive=self.adaptive_concurrency)
+        self.concurrency = concurrency
+        self.report = CrawlReport()
+        self.metrics = CrawlMetrics()
+        self.pages_done = 0
+        self.products_found = 0
+        self.pages_failed = 0
+        self.pages_gone = 0
+        self.last_page = None
+        self._gone_urls = set()
+
+    def start_crawl(self, skip_pages=(), last_page=None, concurrency=None):
+        """
+        Start a new scrape run and return the PageCrawl its pages are scheduled through.
+
+        Args:
+            skip_pages (Iterable[int]): Pages saved by an earlier attempt of the run, which are not fetched.
+            last_page (int | None): Last page of the category found by that attempt.
+            concurrency (AimdController | None): Limit of in-flight requests shared with other
+                scrapers. A limit of the scraper's own is created when None.
+
+        Returns:
+            PageCrawl: The pages of the run.
+        """
+        self._start_run(concurrency)
+        return PageCrawl(self, skip_pages, last_page)
+
+    def finish_crawl(self):
+        """Close and log the report and the metrics of the current scrape run."""
+        self.report.finish(self.concurrency)
+        self.report.log_summary()
+        self.metrics.finish()
+        self.metrics.log_summary()
+        if self.metrics_path:
+            self.metrics.write(self.metrics_path)
+
+    def _retry_delay(self, url, attempt, error, status=None, retry_after=None):
+        """Return the backoff before retrying a failed request, or None if the page is given up."""
+        # Network errors and timeouts have no status and are retried like throttling
+        retryable = status is None or status in RETRYABLE_STATUSES
+        self.metrics.request_failed(status)
+        if not retryable and 400 <= status < 500:
+            # A page the site does not have any more, fetching it again would not help
+            self._gone_urls.add(url)
+        if retryable:
+            self.concurrency.on_throttle()
+        if not retryable or attempt >= self.retry_policy.max_retries:
+            logging.error(f"Failed to fetch {url}: {error}")
+            self.report.page_failed(url, error, attempt + 1)
+            self.metrics.page_failed(url)
+            return None
+        if retry_after:
+            # The host asked for a break, so no other request should hit it meanwhile either
+            self.concurrency.pause(retry_after)
+        delay = self.retry_policy.delay(attempt, retry_after)
+        self.report.retry_scheduled(status)
+        logging.warning(f"Retrying {url} in {delay:.1f}s after: {error}")
+        return delay
+
+    def _get_with_retries(self, url, headers=None):
+        """GET a URL within the concurrency limit, retrying throttled and failed requests."""
+        attempt = 0
+        while True:
+            with self.concurrency.slot():
+                self.report.request_sent()
+                started = time.monotonic()
+                try:
+                    # Streaming splits the time to the response headers from the body download,
+                    # which is read here so it still counts against the slot
+                    response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True)
+                    headers_at = time.monotonic()
+                    response.content
+                except requests.exceptions.RequestException as e:
+                    response, error = None, str(e)
+
+            if response is not None and (response.ok or response.status_code == 304):
+                finished = time.monotonic()
+                self.concurrency.on_success(finished - started)
+                # requests does not expose DNS and connect times, they are part of the TTFB here
+                self.metrics.fetched(url, response.status_code, {
+                    "ttfb_ms": (headers_at - started) * 1000,
+                    "download_ms": (finished - headers_at) * 1000,
+                    "total_ms": (finished - started) * 1000,
+                }, len(response.content))
+                return response
+            if response is None:
+                delay = self._retry_delay(url, attempt, error)
+            else:
+                delay = self._retry_delay(url, attempt, f"HTTP {response.status_code} {response.reason}",
+                                          response.status_code, parse_retry_after(response.headers.get("Retry-After")))
+            if delay is None:
+                return None
+            time.sleep(delay)
+            attempt += 1
+
+    async def _get_with_retries_async(self, client, url, headers=None):
+        """Async counterpart of _get_with_retries using the shared async client."""
+        import httpx
+
+        attempt = 0
+        while True:
+            async with self.concurrency.async_slot():
+                self.report.request_sent()
+                started = time.monotonic()
+                trace = HttpxTrace()
+                try:
+                    response = await client.get(url, headers=headers, extensions={"trace": trace})
+                except httpx.HTTPError as e:
+                    response, error = None, str(e) or type(e).__name__
+
+            if response is not None and (response.is_success or response.status_code == 304):
+                self.concurrency.on_success(time.monotonic() - started)
+                self.metrics.fetched(url, response.status_code, trace.timings(), len(response.content))
+                return response
+            if response is None:
+                delay = self._retry_delay(url, attempt, error)
+            else:
+                delay = self._retry_delay(url, attempt, f"HTTP {response.status_code} {response.reason_phrase}",
+                                          response.status_code, parse_retry_after(response.headers.get("Retry-After")))
+            if delay is None:
+                return None
+            await asyncio.sleep(delay)
+            attempt += 1
 
     def fetch_page(self, url):
-        """Fetch a single page from the given URL."""
-        try:
-            response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-            response.raise_for_status()
-            return response.content
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to fetch {url}: {e}")
+        """Fetch a single page from the given URL, revalidating cached copies when a page cache is set."""
+        entry, page_content = self._fresh_cached_page(url)
+        if page_content is not None:
+            self.metrics.fetched(url, None, {}, len(page_content), from_cache=True)
+            return page_content
+
+        headers = self.page_cache.conditional_headers(entry) if entry else None
+        response = self._get_with_retries(url, headers)
+        if response is not None and response.status_code == 304:
+            page_content = self.page_cache.revalidated(entry) if entry else None
+            if page_content is not None:
+                return page_content
+            # The cached body was evicted meanwhile, download it again
+            response = self._get_with_retries(url)
+        if response is None:
+            return None
+        if self.page_cache is not None:
+            self.page_cache.store(url, response.content, response.headers)
+        return response.content
+
+    async def fetch_page_async(self, client, url):
+        """Fetch a single page from the given URL with the shared async client."""
+        entry, page_content = self._fresh_cached_page(url)
+        if page_content is not None:
+            self.metrics.fetched(url, None, {}, len(page_content), from_cache=True)
+            return page_content
+
+        headers = self.page_cache.conditional_headers(entry) if entry else None
+        response = await self._get_with_retries_async(client, url, headers)
+        if response is not None and response.status_code == 304:
+            page_content = self.page_cache.revalidated(entry) if entry else None
+            if page_content is not None:
+                return page_content
+            # The cached body was evicted meanwhile, download it again
+            response = await self._get_with_retries_async(client, url)
+        if response is None:
             return None
+        if self.page_cache is not None:
+            self.page_cache.store(url, response.content, response.headers)
+        return response.content
 
     def parse_product_page(self, page_content):
         """Parse the HTML content of a page and extract product data."""
-        soup = BeautifulSoup(page_content, "html.parser")
-        trendyol_data = []
+        return parse_products(page_content, self.parser_backend)
 
-        # Use .select() to find product containers
-        product_containers = soup.select("div.p-card-wrppr")
-        for product in product_containers:
-            try:
-                brand = product.select_one("span.prdct-desc-cntnr-ttl")
-                product_name = product.select_one("span.prdct-desc-cntnr-name.hasRatings")
-                product_desc = product.select_one("div.product-desc-sub-text")
-                rating_score = product.select_one("span.rating-score")
-                ratings = product.select_one("div.ratings")
-                price = product.select_one("div.price-item.discounted")
-
-                brand = brand.text.strip() if brand else None
-                product_name = product_name.text.strip() if product_name else None
-                product_desc = product_desc.text.strip() if product_desc else None
-                rating_score = rating_score.text.strip() if rating_score else None
-                ratings = ratings.text.strip("()") if ratings else None
-                price = price.text.strip() if price else None
-
-                trendyol_data.append({
-                    "Product Brand": brand,
-                    "Product Name": product_name,
-                    "Product Description": product_desc,
-                    "Rating Score": rating_score,
-                    "Rating Count": ratings,
-                    "Price (TL)": price
-                })
-            except Exception as e:
-                logging.warning(f"Failed to parse a product: {e}")
+    def _make_parse_pool(self):
+        """Create the process pool used for parsing, or None to parse inline."""
+        if self.parse_workers == 0:
+            return None
+        return ProcessPoolExecutor(max_workers=self.parse_workers)
 
-        return trendyol_data
+    def iter_pages(self, skip_pages=(), last_page=None):
+        """
+        Fetch and parse all pages, yielding (page, products) batches as soon as each page is parsed.
 
-    def scrape_trendyol(self):
-        """Scrape Trendyol website and return a list of product data."""
-        trendyol_data = []
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {}
+        When parse_workers is not 0, fetched HTML is handed to a process pool so parsing
+        runs on all cores while the remaining pages are still being fetched.
+
+        Args:
+            skip_pages (Iterable[int]): Pages saved by an earlier attempt of the run, which are not fetched.
+            last_page (int | None): Last page of the category found by that attempt.
+        """
+        if self.async_mode:
+            yield from self._drive_async(self.aiter_pages(skip_pages, last_page))
+            return
+
+        crawl = self.start_crawl(skip_pages, last_page)
+        fetch_pool = ThreadPoolExecutor(max_workers=self.concurrency.max_limit)
+        parse_pool = self._make_parse_pool()
+        # Body hashes of the pages being parsed on the process pool
+        parses = {}
+
+        def schedule():
+            while (page := crawl.next_page()) is not None:
+                crawl.add(fetch_pool.submit(self.fetch_page, self.page_url(page)), page)
+
+        try:
+            schedule()
+            while crawl.pending:
+                done, _ = wait(set(crawl.pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = crawl.pop(future)
+                    parsing, body_hash = future in parses, parses.pop(future, None)
+                    if page is None:
+                        # Cancelled as beyond the last page while we were waiting
+                        continue
+                    try:
+                        if parsing:
+                            page_data = crawl.parsed(page, body_hash, *future.result())
+                        elif parse_pool is None or not future.result():
+                            page_data = crawl.parse_inline(page, future.result())
+                        else:
+                            body_hash, page_data = crawl.cached_rows(page, future.result())
+                            if page_data is None:
+                                parse_future = parse_pool.submit(parse_products_timed, future.result(),
+                                                                 self.parser_backend)
+                                crawl.add(parse_future, page)
+                                parses[parse_future] = body_hash
+                                continue
+                    except Exception as e:
+                        page_data = crawl.failed(page, e)
+                    if (page_data := crawl.finish(page, page_data)) is not None:
+                        yield page, page_data
+                schedule()
+        finally:
+            fetch_pool.shutdown(cancel_futures=True)
+            if parse_pool is not None:
+                parse_pool.shutdown(cancel_futures=True)
+            self.finish_crawl()
+
+    async def aiter_pages(self, skip_pages=(), last_page=None):
+        """Async counterpart of iter_pages that fetches over one pooled keep-alive client."""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        crawl = self.start_crawl(skip_pages, last_page)
+        parse_pool = self._make_parse_pool()
+        limits = httpx.Limits(
+            max_connections=self.concurrency.max_limit,
+            max_keepalive_connections=self.concurrency.max_limit
+        )
+        try:
+            async with httpx.AsyncClient(headers=REQUEST_HEADERS, timeout=REQUEST_TIMEOUT, limits=limits,
+                                         http2=self.http2, follow_redirects=True) as client:
+
+                async def process_page(page):
+                    page_content = await self.fetch_page_async(client, self.page_url(page))
+                    if parse_pool is None or not page_content:
+                        return crawl.parse_inline(page, page_content)
+                    body_hash, page_data = crawl.cached_rows(page, page_content)
+                    if page_data is None:
+                        page_data, seconds = await loop.run_in_executor(
+                            parse_pool, parse_products_timed, page_content, self.parser_backend
+                        )
+                        page_data = crawl.parsed(page, body_hash, page_data, seconds)
+                    return page_data
+
+                def schedule():
+                    while (page := crawl.next_page()) is not None:
+                        crawl.add(asyncio.ensure_future(process_page(page)), page)
 
-            for page in range(1, self.max_pages + 1):
-                url = f"{self.base_url}?pi={page}" if page > 1 else self.base_url
-                futures[executor.submit(self.fetch_page, url)] = page
+                try:
+                    schedule()
+                    while crawl.pending:
+                        done, _ = await asyncio.wait(set(crawl.pending), return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            page = crawl.pop(task)
+                            if page is None:
+                                # Cancelled as beyond the last page while we were waiting
+                                continue
+                            try:
+                                page_data = task.result()
+                            except Exception as e:
+                                page_data = crawl.failed(page, e)
+                            if (page_data := crawl.finish(page, page_data)) is not None:
+                                yield page, page_data
+                        schedule()
+                finally:
+                    for task in crawl.pending:
+                        task.cancel()
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown(cancel_futures=True)
+            self.finish_crawl()
 
-            for future in as_completed(futures):
-                page = futures[future]
+    @staticmethod
+    def _drive_async(async_gen):
+        """Iterate an async generator from synchronous code on a private event loop."""
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
                 try:
-                    page_content = future.result()
-                    if page_content:
-                        page_data = self.parse_product_page(page_content)
-                        trendyol_data.extend(page_data)
-                        logging.info(f"Page {page} scraped successfully. {len(page_data)} products found.")
-                    else:
-                        logging.warning(f"No content for page {page}.")
-                except Exception as e:
-                    logging.error(f"Error processing page {page}: {e}")
+                    yield loop.run_until_complete(async_gen.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(async_gen.aclose())
+            loop.close()
+
+    def scrape_trendyol(self):
+        """Scrape Trendyol website and return a list of product data."""
+        trendyol_data = []
+        for _, page_data in self.iter_pages():
+            trendyol_data.extend(page_data)
+        return trendyol_data
 
+    async def scrape_trendyol_async(self):
+        """Scrape Trendyol website over one pooled keep-alive client and return a list of product data."""
+        trendyol_data = []
+        async for _, page_data in self.aiter_pages():
+            trendyol_data.extend(page_data)
         return trendyol_data
 
     def save_to_csv(self, data):
@@ -101,12 +641,96 @@ class TrendyolScraper:
             df.to_csv(self.output_file, mode='w', header=True, index=False, encoding='utf-8')
         logging.info(f"Data saved to {self.output_file}")
 
+    def _checkpoint_path(self):
+        """Return the checkpoint file of the run, next to its output."""
+        if self.checkpoint_file:
+            return self.checkpoint_file
+        if self.store_dir:
+            from src.dataset_store import category_slug
+
+            # Hidden, so the dataset store does not read it as a partition
+            return os.path.join(self.store_dir, ".checkpoints", f"{category_slug(self.base_url)}.json")
+        return f"{self.output_file}.checkpoint.json"
+
+    def open_run(self, run_id=None):
+        """
+        Resume the checkpointed run of the category or start a new one, and return (checkpoint, sink).
+
+        A new store run gets run_id, or a fresh identifier when it is None.
+        """
+        from src.row_sink import Checkpoint, CsvSink, StoreSink
+
+        path = self._checkpoint_path()
+        checkpoint = Checkpoint.load(path, self.base_url)
+        if checkpoint is not None and checkpoint.resumes >= self.max_resumes:
+            logging.warning(f"Run {checkpoint.run_id or path} was resumed {checkpoint.resumes} times and still has "
+                            f"failed pages. Giving them up and starting a new run.")
+            checkpoint.remove()
+            checkpoint = None
+        if checkpoint is not None:
+            checkpoint.resumes += 1
+            logging.info(f"Resuming from {path}: {len(checkpoint.pages)} pages with {checkpoint.rows} "
+                         f"products already saved.")
+        else:
+            checkpoint = Checkpoint(path, self.base_url)
+        index = None
+        if self.index_path:
+            from src.product_index import ProductIndex
+
+            index = ProductIndex(self.index_path)
+        if not self.store_dir and index is None:
+            return checkpoint, CsvSink(self.output_file, self.flush_rows, checkpoint)
+
+        from src.dataset_store import category_slug, new_run_id
+
+        checkpoint.run_id = checkpoint.run_id or run_id or new_run_id()
+        category = category_slug(self.base_url)
+        if not self.store_dir:
+            # The index records CSV runs under a run identifier of their own
+            return checkpoint, CsvSink(self.output_file, self.flush_rows, checkpoint, index, checkpoint.run_id,
+                                       category)
+        self.run_id = checkpoint.run_id
+        return checkpoint, StoreSink(self.store_dir, category, checkpoint.run_id, self.flush_rows, checkpoint, index)
+
     def run(self):
-        """Run the scraping process and save the data to CSV."""
+        """
+        Run the scraping process and return the run's CrawlReport.
+
+        Rows are written to the output in batches of flush_rows while the crawl goes on, so
+        memory does not grow with the number of pages. Written pages are recorded in a
+        checkpoint. If the run crashes or pages fail, calling run() again fetches only the
+        pages that are still missing, up to max_resumes times. The checkpoint is removed once
+        every page is saved or gone.
+        """
         logging.info("Starting Trendyol scraper...")
-        data = self.scrape_trendyol()
-        if data:
-            self.save_to_csv(data)
-            logging.info(f"Scraping completed. {len(data)} products saved.")
+        self.run_id = None
+        checkpoint, sink = self.open_run()
+        try:
+            for page, page_data in self.iter_pages(checkpoint.pages, checkpoint.last_page):
+                checkpoint.last_page = self.last_page
+                sink.add(page, page_data)
+        finally:
+            # Keep what was scraped before a crash, the checkpoint lets the next run continue from it
+            sink.flush()
+            sink.close()
+        self.close_run(checkpoint)
+        return self.report
+
+    def close_run(self, checkpoint):
+        """Keep the checkpoint while pages failed and remove it once the run is complete."""
+        if self.pages_failed:
+            checkpoint.save()
+            logging.warning(f"{self.pages_failed} pages of {self.base_url} failed. "
+                            f"Run again to fetch only the missing pages.")
+        else:
+            checkpoint.remove()
+        if self.pages_gone:
+            logging.warning(f"{self.pages_gone} pages of {self.base_url} are gone from the site and were skipped.")
+        if checkpoint.rows:
+            logging.info(f"Scraping completed. {checkpoint.rows} products saved.")
+        elif self.index_path and self.pages_done > self.pages_failed:
+            self.run_id = None
+            logging.info("Scraping completed. No product is new or changed since the last run.")
         else:
+            self.run_id = None
             logging.warning("No data scraped.")
@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+
+from benchmarks.synthetic import raw_products
+from src import analytics
+from src.cleaner import DataCleaner, brand_summary_path
+
+
+def test_incremental_summary_covers_the_whole_output(tmp_path):
+    raw, output = tmp_path / "raw.csv", tmp_path / "cleaned.csv"
+    rows = raw_products(3000)
+    rows[:2000].to_csv(raw, index=False)
+    cleaner = DataCleaner(file_path=str(raw))
+    cleaner.clean_incremental(str(output), str(tmp_path / "state.sqlite"), chunksize=500)
+    rows[2000:].to_csv(raw, mode="a", header=False, index=False)
+    cleaner.clean_incremental(str(output), str(tmp_path / "state.sqlite"), chunksize=500)
+
+    summary = pd.read_parquet(brand_summary_path(str(output)))
+    expected = analytics.brand_summary(pd.read_csv(output))
+    pd.testing.assert_frame_equal(summary, expected, check_dtype=False)
+
+
+def test_replaced_raw_csv_is_cleaned_from_the_start(tmp_path):
+    raw, output, state = tmp_path / "raw.csv", tmp_path / "cleaned.csv", str(tmp_path / "state.sqlite")
+    rows = raw_products(3000)
+    rows[:2000].to_csv(raw, index=False)
+    cleaner = DataCleaner(file_path=str(raw))
+    cleaner.clean_incremental(str(output), state, chunksize=500)
+    cleaned = len(pd.read_csv(output))
+
+    # A shorter file: the watermark lies past its end
+    rows[1500:2500].to_csv(raw, index=False)
+    cleaner.clean_incremental(str(output), state, chunksize=500)
+    after_truncation = len(pd.read_csv(output))
+    assert after_truncation > cleaned
+
+    # A longer file written in place of the old one: only the inode tells it apart
+    replacement = tmp_path / "replacement.csv"
+    rows.to_csv(replacement, index=False)
+    os.replace(replacement, raw)
+    cleaner.clean_incremental(str(output), state, chunksize=500)
+
+    # Rows cleaned before were dropped by the key index instead of being appended twice
+    expected = DataCleaner(file_path=str(raw)).clean()
+    assert len(pd.read_csv(output)) == len(expected)
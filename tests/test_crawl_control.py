@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+from src.crawl_control import AimdController, RetryPolicy
+
+
+def test_retry_after_beyond_max_delay_is_waited_for():
+    policy = RetryPolicy(max_retries=3, base_delay=0.1, max_delay=1.0)
+    assert policy.delay(0, retry_after=5.0) == 5.0
+    assert policy.delay(0) <= 0.1
+
+
+def test_pause_holds_back_new_requests():
+    controller = AimdController(2, 2, adaptive=False)
+    controller.pause(0.3)
+    started = time.monotonic()
+    with controller.slot():
+        pass
+    assert time.monotonic() - started >= 0.3
+
+
+def test_pause_holds_back_async_requests():
+    controller = AimdController(2, 2, adaptive=False)
+
+    async def request():
+        async with controller.async_slot():
+            return time.monotonic()
+
+    controller.pause(0.3)
+    started = time.monotonic()
+    assert asyncio.run(request()) - started >= 0.3
@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.dataset_registry import DatasetRegistry, result_bytes
+from src.jobs import DONE
+from src.table_view import TableView
+
+
+class FinishedJob:
+    def __init__(self, result):
+        self.status = DONE
+        self.finished = True
+        self.result = result
+        self.finished_at = time.time()
+
+    def release_result(self):
+        result, self.result = self.result, None
+        return result
+
+
+class Jobs:
+    def submit(self, base_url, max_pages):
+        rows = 10_000
+        return FinishedJob({"cleaned_data": pd.DataFrame({
+            "Product Brand": np.arange(rows) % 7,
+            "Product Name": [f"{base_url} {i}" for i in range(rows)],
+            "Product Description": "128 GB",
+        })})
+
+
+def test_derived_objects_count_towards_the_budget_and_are_evicted():
+    registry = DatasetRegistry(Jobs())
+    first = registry.request("https://example.com/a", 1)
+    dataset_size = result_bytes(registry.get(first))
+    view = registry.derived(first, "table_view", lambda result: TableView(result["cleaned_data"]))
+
+    assert registry.derived(first, "table_view", None) is view
+    assert registry.total_bytes() == dataset_size + view.nbytes() > dataset_size
+
+    # Room for both datasets, but not for the table view of the first one as well
+    registry.max_bytes = 2 * dataset_size + view.nbytes() // 2
+    second = registry.request("https://example.com/b", 1)
+
+    assert registry.get(second) is not None
+    assert registry.get(first) is None
+    assert registry.derived(first, "table_view", None) is None
@@ -0,0 +1,34 @@
+import pytest
+
+from benchmarks.standin_server import StandinServer
+from src.multi_category import MultiCategoryScraper
+from src.trendyol_scraper import TrendyolScraper
+
+PAGES = 12
+CARDS = 24
+
+
+def scrape(url, engine, tmp_path):
+    """Return the sorted products and (pages done, last page) of one engine."""
+    options = dict(max_pages=PAGES + 5, adaptive_pagination=True, cache_dir=str(tmp_path / "cache"))
+    if engine == "multi":
+        scraper = MultiCategoryScraper([url], **options)
+        rows = [row for _, _, page_data in scraper.iter_pages() for row in page_data]
+        scraper = scraper.scrapers[url]
+    else:
+        scraper = TrendyolScraper(base_url=url, async_mode=engine.startswith("async"),
+                                  parse_workers=2 if engine.endswith("pool") else 0, **options)
+        rows = [row for _, page_data in scraper.iter_pages() for row in page_data]
+    products = sorted(repr([value for key, value in row.items() if key != "Category"]) for row in rows)
+    return products, (scraper.pages_done, scraper.last_page)
+
+
+@pytest.mark.parametrize("engine", ["sync", "sync-pool", "async", "async-pool", "multi"])
+def test_engines_agree(tmp_path, engine):
+    with StandinServer(total_products=PAGES * CARDS - 5, missing_pages={4}) as server:
+        products, progress = scrape(server.url, engine, tmp_path)
+        # A second crawl reuses the rows parsed from the cached pages
+        assert scrape(server.url, engine, tmp_path) == (products, progress)
+
+    assert len(products) == (PAGES - 1) * CARDS - 5
+    assert progress == (PAGES, PAGES)
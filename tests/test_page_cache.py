@@ -0,0 +1,85 @@
+import os
+
+from benchmarks.standin_server import StandinServer
+from src.page_cache import PageCache
+from src.trendyol_scraper import TrendyolScraper
+
+HEADERS = {"ETag": '"v1"'}
+
+
+def stored_bodies(cache_dir):
+    objects = os.path.join(cache_dir, "objects")
+    return sorted(name for _, _, names in os.walk(objects) for name in names)
+
+
+def object_sizes(cache_dir):
+    objects = os.path.join(cache_dir, "objects")
+    return [os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(objects) for name in names]
+
+
+def test_changed_page_drops_its_old_body_and_rows(tmp_path):
+    cache = PageCache(str(tmp_path))
+    old, new = b"<html>old</html>", b"<html>new</html>"
+    cache.store("https://example.com/?pi=1", old, HEADERS)
+    cache.put_rows(cache.content_key(old), "lxml", [{"Product Name": "old"}])
+    cache.put_rows(cache.content_key(old), "bs4", [{"Product Name": "old (bs4)"}])
+    assert cache.get_rows(cache.content_key(old), "lxml") == [{"Product Name": "old"}]
+    assert cache.get_rows(cache.content_key(new), "lxml") is None
+
+    cache.store("https://example.com/?pi=1", new, {})
+
+    entry = cache.lookup("https://example.com/?pi=1")
+    assert (entry["body_hash"], entry["etag"]) == (cache.content_key(new), None)
+    assert cache.read(entry) == new
+    assert stored_bodies(str(tmp_path)) == [cache.content_key(new)]
+    assert cache.get_rows(cache.content_key(old), "lxml") is None
+    assert cache.get_rows(cache.content_key(old), "bs4") is None
+
+
+def test_least_recently_used_pages_are_evicted(tmp_path):
+    body = b"x" * 100
+    cache = PageCache(str(tmp_path), max_bytes=250)
+    cache.store("https://example.com/?pi=1", body + b"1", HEADERS)
+    cache.store("https://example.com/?pi=2", body + b"2", HEADERS)
+    # Reading page 1 makes page 2 the least recently used one
+    cache.read(cache.lookup("https://example.com/?pi=1"))
+    cache.put_rows(cache.content_key(body + b"2"), "lxml", [])
+
+    cache.store("https://example.com/?pi=3", body + b"3", HEADERS)
+
+    assert cache.lookup("https://example.com/?pi=2") is None
+    assert cache.get_rows(cache.content_key(body + b"2"), "lxml") is None
+    assert cache.lookup("https://example.com/?pi=1") is not None
+    assert cache.lookup("https://example.com/?pi=3") is not None
+    assert stored_bodies(str(tmp_path)) == sorted(cache.content_key(body + page) for page in (b"1", b"3"))
+
+
+def test_shared_body_is_kept_while_referenced(tmp_path):
+    body = b"x" * 100
+    cache = PageCache(str(tmp_path), max_bytes=250)
+    cache.store("https://example.com/?pi=1", body, HEADERS)
+    cache.store("https://example.com/?page=1", body, HEADERS)
+    cache.store("https://example.com/?pi=2", body + b"2", HEADERS)
+    # Identical bodies are stored and counted once
+    assert stored_bodies(str(tmp_path)) == sorted(cache.content_key(page) for page in (body, body + b"2"))
+    cache.read(cache.lookup("https://example.com/?page=1"))
+
+    cache.store("https://example.com/?pi=3", body + b"3", HEADERS)
+
+    # Evicting the first URL freed nothing, the second one still points at its body
+    assert cache.lookup("https://example.com/?pi=1") is None
+    assert cache.lookup("https://example.com/?pi=2") is None
+    assert cache.read(cache.lookup("https://example.com/?page=1")) == body
+
+
+def test_scraper_cache_stays_within_its_budget(tmp_path):
+    with StandinServer(total_products=10 * 24) as server:
+        full = TrendyolScraper(base_url=server.url, max_pages=10, cache_dir=str(tmp_path / "full"))
+        assert sum(len(page_data) for _, page_data in full.iter_pages()) == 10 * 24
+        budget = 3 * max(object_sizes(str(tmp_path / "full")))
+        scraper = TrendyolScraper(base_url=server.url, max_pages=10, cache_dir=str(tmp_path / "cache"),
+                                  cache_max_bytes=budget)
+        rows = [row for _, page_data in scraper.iter_pages() for row in page_data]
+
+    assert len(rows) == 10 * 24
+    assert 0 < sum(object_sizes(str(tmp_path / "cache"))) <= budget
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from src.parsers import parse_products_bs4, parse_products_lxml
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+LISTINGS = sorted(name for name in os.listdir(FIXTURES) if name.endswith(".html"))
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name", LISTINGS)
+def test_lxml_matches_bs4(name):
+    html = read_fixture(name)
+    assert parse_products_lxml(html) == parse_products_bs4(html)
+
+
+def test_listing_fields():
+    products = parse_products_lxml(read_fixture("listing_phones.html"))
+    assert len(products) == 5
+    assert products[1]["Product Brand"] == "Samsung"
+    assert products[1]["Product Name"] == "Galaxy A55 8 GB RAM 256 GB Lacivert"
+    assert products[2]["Rating Score"] is None
+    assert products[3]["Product Brand"] == "Çağ & Şık"
+    assert products[3]["Price (TL)"] == "2.499,99 TL"
+
+
+def test_empty_listing():
+    assert parse_products_lxml(read_fixture("listing_empty.html")) == []
+
+
+def test_hidden_text_is_skipped():
+    html = (
+        '<div class="p-card-wrppr"><span class="prdct-desc-cntnr-ttl">Brand<script>var x = 1;</script></span>'
+        '<span class="prdct-desc-cntnr-name">Name<style>.a{}</style> Tail</span>'
+        '<div class="price-item">10 TL</div></div>'
+    )
+    assert parse_products_lxml(html) == parse_products_bs4(html)
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from src.product_index import ProductIndex
+
+ROWS = [
+    {"Product Brand": "Apple", "Product Name": "iPhone 15", "Product Description": "128 GB",
+     "Rating Score": 4.6, "Rating Count": 120, "Price (TL)": "64.999 TL"},
+    {"Product Brand": "Samsung", "Product Name": "Galaxy S24", "Product Description": "256 GB",
+     "Rating Score": 4.4, "Rating Count": 80, "Price (TL)": "49.999 TL"},
+]
+
+
+def test_only_new_and_changed_products_are_recorded(tmp_path):
+    index = ProductIndex(str(tmp_path / "index.sqlite"))
+    assert list(index.record(ROWS, "r1", "phones")["_change"]) == ["new", "new"]
+
+    # The same rows read back from a CSV, with their ratings as strings, are no change
+    assert index.diff(pd.DataFrame(ROWS).astype(str)).empty
+
+    cheaper = {**ROWS[0], "Price (TL)": "59.999 TL"}
+    added = {**ROWS[1], "Product Name": "Galaxy A55"}
+    changes = index.diff([cheaper, ROWS[1], added])
+    assert dict(zip(changes["Product Name"], changes["_change"])) == {"iPhone 15": "changed", "Galaxy A55": "new"}
+    index.commit(changes, "r2", "phones")
+
+    since = index.changes_since("r1")
+    assert sorted(zip(since["Product Name"], since["Change"], since["Run"])) == \
+        [("Galaxy A55", "new", "r2"), ("iPhone 15", "changed", "r2")]
+    assert len(index.changes_since()) == 4
+
+    history = index.price_history("Apple", "iPhone 15", "128 GB")
+    assert list(zip(history["Run"], history["Price (TL)"])) == [("r1", "64.999 TL"), ("r2", "59.999 TL")]
+    assert len(index.current()) == 3
+
+
+def test_run_without_changes_is_registered(tmp_path):
+    index = ProductIndex(str(tmp_path / "index.sqlite"))
+    index.record(ROWS, "r1")
+    assert index.record(ROWS, "r2").empty
+
+    runs = index.runs()
+    assert list(zip(runs["Run"], runs["Changed Products"])) == [("r1", 2), ("r2", 0)]
+    # Asking what changed since the unchanged run works instead of failing as an unknown run
+    assert index.changes_since("r2").empty
+    index.record([{**ROWS[1], "Rating Count": 81}], "r3")
+    assert list(index.changes_since("r2")["Run"]) == ["r3"]
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import raw_products
+from src import analytics
+from src.cleaner import DataCleaner
+from src.dataset_store import DatasetStore
+from src.query_engine import PandasQueryEngine
+
+pytest.importorskip("duckdb")
+from src.query_engine import DuckDBQueryEngine  # noqa: E402
+
+FILTERS = [
+    analytics.Filters(min_rating_count=0, price_range=(20_000.0, 60_000.0)),
+    analytics.Filters(brands=("Apple", "Oppo")),
+]
+
+
+@pytest.mark.parametrize("selected", [0, 1, 2])
+def test_store_queries_match_the_cleaned_frame(tmp_path, selected):
+    store = DatasetStore(str(tmp_path / "store"))
+    rows = raw_products(5000)
+    first = store.write_run(rows[:2000], "phones")
+    store.write_run(rows[2000:3000], "phones", first)
+    second = store.write_run(rows[2500:], "phones")
+    store.write_run(rows[:100], "tablets")
+    runs = [[first], [second], [first, second]][selected]
+
+    df = DataCleaner(store_dir=store.root, categories=["phones"], runs=runs, compact_dtypes=False).clean()
+    expected = PandasQueryEngine(df)
+    engine = DuckDBQueryEngine(store.root, "phones", [first])
+
+    assert engine.runs() == [first, second]
+    assert engine.price_bounds(runs) == expected.price_bounds()
+    assert engine.brands(runs) == expected.brands()
+    columns = ["Product Brand", "Product Name", "Price (TL)", "Rating Score"]
+    for filters in FILTERS:
+        filters = filters._replace(runs=tuple(runs))
+        pd.testing.assert_frame_equal(engine.brand_summary(filters).reset_index(drop=True),
+                                      expected.brand_summary(filters).reset_index(drop=True), check_dtype=False)
+        pd.testing.assert_frame_equal(engine.rows(filters, columns),
+                                      expected.rows(filters, columns).reset_index(drop=True), check_dtype=False)
+        pd.testing.assert_frame_equal(engine.correlation(filters), expected.correlation(filters))
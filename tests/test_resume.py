@@ -0,0 +1,87 @@
+import os
+
+import pandas as pd
+
+from benchmarks.standin_server import StandinServer
+from src.trendyol_scraper import TrendyolScraper
+
+PAGES = 10
+CARDS = 24
+
+
+def scraper(server, tmp_path, **options):
+    return TrendyolScraper(base_url=server.url, max_pages=PAGES, max_workers=4,
+                           output_file=str(tmp_path / "raw.csv"), **options)
+
+
+def saved_rows(tmp_path):
+    return len(pd.read_csv(tmp_path / "raw.csv"))
+
+
+def test_failed_page_is_fetched_by_the_next_run(tmp_path):
+    with StandinServer(total_products=PAGES * CARDS, failing_pages={3}) as server:
+        first = scraper(server, tmp_path, max_retries=0)
+        first.run()
+        assert first.pages_failed == 1
+        assert os.path.exists(tmp_path / "raw.csv.checkpoint.json")
+
+        server.failing_pages.clear()
+        second = scraper(server, tmp_path, max_retries=0)
+        second.run()
+
+    assert second.pages_failed == 0
+    assert not os.path.exists(tmp_path / "raw.csv.checkpoint.json")
+    assert server.page_requests == {page: 2 if page == 3 else 1 for page in range(1, PAGES + 1)}
+    assert saved_rows(tmp_path) == PAGES * CARDS
+
+
+def test_missing_page_does_not_keep_the_checkpoint(tmp_path):
+    with StandinServer(total_products=PAGES * CARDS, missing_pages={7}) as server:
+        first = scraper(server, tmp_path)
+        first.run()
+        assert (first.pages_failed, first.pages_gone) == (0, 1)
+        assert not os.path.exists(tmp_path / "raw.csv.checkpoint.json")
+
+        # The next run is a new one that fetches every page again
+        scraper(server, tmp_path).run()
+
+    assert server.page_requests[7] == 2
+    assert server.page_requests[1] == 2
+    assert saved_rows(tmp_path) == 2 * (PAGES - 1) * CARDS
+
+
+def test_resume_is_given_up_after_max_resumes(tmp_path):
+    with StandinServer(total_products=PAGES * CARDS, failing_pages={3}) as server:
+        for _ in range(3):
+            scraper(server, tmp_path, max_retries=0, max_resumes=2).run()
+        # The first run and two resumes, which only asked for the failing page
+        assert server.page_requests[3] == 3
+        assert server.page_requests[1] == 1
+
+        scraper(server, tmp_path, max_retries=0, max_resumes=2).run()
+
+    assert server.page_requests[1] == 2
+    assert saved_rows(tmp_path) == 2 * (PAGES - 1) * CARDS
+
+
+def test_store_run_is_resumed_under_the_same_run_id(tmp_path):
+    from src.dataset_store import DatasetStore, category_slug
+
+    store_dir = str(tmp_path / "store")
+    with StandinServer(total_products=PAGES * CARDS, failing_pages={3}) as server:
+        first = TrendyolScraper(base_url=server.url, max_pages=PAGES, store_dir=store_dir, max_retries=0)
+        first.run()
+        checkpoint = os.path.join(store_dir, ".checkpoints", f"{category_slug(server.url)}.json")
+        assert os.path.exists(checkpoint)
+
+        server.failing_pages.clear()
+        second = TrendyolScraper(base_url=server.url, max_pages=PAGES, store_dir=store_dir, max_retries=0)
+        second.run()
+
+    assert second.run_id == first.run_id
+    assert not os.path.exists(checkpoint)
+    assert server.page_requests == {page: 2 if page == 3 else 1 for page in range(1, PAGES + 1)}
+    store = DatasetStore(store_dir)
+    category = category_slug(server.url)
+    assert store.runs(category) == [first.run_id]
+    assert len(store.read_files(store.run_files(category, first.run_id))) == PAGES * CARDS
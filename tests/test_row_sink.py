@@ -0,0 +1,29 @@
+import pandas as pd
+
+from src.product_index import ProductIndex
+from src.row_sink import CsvSink
+
+COLUMNS = ["Product Brand", "Product Name", "Product Description", "Rating Score", "Rating Count", "Price (TL)"]
+
+
+def product(number, price="100 TL"):
+    return {"Product Brand": "Marka", "Product Name": f"Telefon {number}", "Product Description": "128 GB",
+            "Rating Score": 4.5, "Rating Count": 10, "Price (TL)": price}
+
+
+def test_new_columns_are_added_to_an_existing_csv(tmp_path):
+    output_file = tmp_path / "raw_data.csv"
+    pd.DataFrame([product(1)], columns=COLUMNS).to_csv(output_file, index=False)
+
+    sink = CsvSink(str(output_file), index=ProductIndex(str(tmp_path / "index.sqlite")), run_id="r1",
+                   category="telefon")
+    sink.add(1, [{**product(2), "Category": "telefon"}])
+    sink.flush()
+    sink.close()
+
+    df = pd.read_csv(output_file)
+    assert df.columns.tolist() == COLUMNS + ["Category", "Run", "Recorded At"]
+    assert df["Product Name"].tolist() == ["Telefon 1", "Telefon 2"]
+    assert df["Run"].isna().tolist() == [True, False]
+    assert df.loc[1, "Category"] == "telefon"
+    assert df.loc[1, "Run"] == "r1"